@@ -0,0 +1,115 @@
+"""Batch analysis of positions written in Board notation.
+
+    python analyze.py positions.txt --player search --time-limit 0.5 --processes 8 > analysis.jsonl
+    cat positions.txt | python analyze.py - --player heuristic
+
+Positions are read one per line from a file or stdin and analyzed in chunks
+across a process pool. For every position one JSON line is written, in input
+order, with the best turn the chosen player type finds and the move score of
+the side to move after that turn. Blank lines are skipped; lines that are not
+valid notation, or that the player type cannot play, get an error entry
+instead.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from itertools import islice
+from multiprocessing import Pool
+from board import Board, NotationError
+from factory import WhitePlayerFactory, BluePlayerFactory, create_player
+from events import NullSink
+from zobrist import WORKER_NAMES
+from tournament import PLAYER_TYPES, init_worker
+
+def analyze_position(task):
+    """Analyze one position and return its result
+
+    task is (line number, notation, player type, seed).
+    """
+    line, text, player_type, seed = task
+    random.seed(seed)
+
+    result = {"line": line, "position": text}
+    try:
+        board = Board.from_notation(text)
+        workers = [board.get_worker(name) for name in WORKER_NAMES]
+        # search and mcts players raise ValueError for boards smaller than 5x5
+        white_player = create_player(WhitePlayerFactory, player_type, workers[0], workers[1], board)
+        blue_player = create_player(BluePlayerFactory, player_type, workers[2], workers[3], board)
+    except (NotationError, ValueError) as error:
+        result["error"] = str(error)
+        return result
+
+    current, other = (white_player, blue_player) if board.get_turn() == 0 else (blue_player, white_player)
+    current.set_events(NullSink())
+    other.set_events(NullSink())
+
+    result["side"] = current.color
+    if other.check_worker_height() or current.check_possible_moves():
+        result["turn"] = None
+        result["winner"] = other.color
+        return result
+
+    current.take_turn()
+    worker, _, _, _ = board.get_last_turn()
+    result["turn"] = {"worker": str(worker), "move": current._move_direction, "build": current._build_direction}
+    result["score"] = current.calculate_move_score()
+    if current.check_worker_height():
+        result["winner"] = current.color
+
+    return result
+
+def read_positions(stream):
+    """Yield (line number, notation) for every non-blank line of stream"""
+    for line, text in enumerate(stream, 1):
+        text = text.strip()
+        if text:
+            yield line, text
+
+def analyze_stream(stream, out, player_type="heuristic", processes=None, chunksize=64, seed=0,
+                   time_limit=None, book=None):
+    """Analyze every position in stream and write one JSON line per position to out
+
+    Positions are read a window of a few chunks per process at a time and
+    handed to the pool chunksize at a time, so dumps larger than memory can
+    be streamed. time_limit and book are the
+    same as for tournament.run_tournament. Return the number of positions.
+    """
+    if player_type not in PLAYER_TYPES:
+        raise ValueError(f"unknown or non-AI player type {player_type}")
+
+    tasks = ((line, text, player_type, seed + line) for line, text in read_positions(stream))
+    window = 4 * chunksize * (processes or os.cpu_count() or 1)
+    count = 0
+    with Pool(processes, initializer=init_worker, initargs=(time_limit, book)) as pool:
+        while True:
+            # Pool.imap would read the whole stream up front
+            batch = list(islice(tasks, window))
+            if not batch:
+                break
+            for result in pool.imap(analyze_position, batch, chunksize):
+                out.write(json.dumps(result) + "\n")
+            count += len(batch)
+
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find the best turn for every position in a file")
+    parser.add_argument("positions", help="file with one position per line, or - for stdin")
+    parser.add_argument("--player", choices=PLAYER_TYPES, default="heuristic")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=64, help="positions handed to a worker at a time")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds per move for search and mcts players")
+    parser.add_argument("--book", default=None, help="opening book file for the AI players")
+    args = parser.parse_args()
+
+    if args.positions == "-":
+        analyze_stream(sys.stdin, sys.stdout, args.player, args.processes, args.chunksize, args.seed,
+                       args.time_limit, args.book)
+    else:
+        with open(args.positions) as stream:
+            analyze_stream(stream, sys.stdout, args.player, args.processes, args.chunksize, args.seed,
+                           args.time_limit, args.book)
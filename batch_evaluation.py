@@ -0,0 +1,73 @@
+"""Vectorized evaluation of many positions at once with NumPy.
+
+Positions are given as arrays: heights with shape (N, 25) indexed by square
+and workers with shape (N, 4) holding the squares of A, B, Y and Z. The
+scores use the same terms and weights as Player.calculate_move_score and
+evaluation.evaluate, so they can be compared with the scalar versions.
+
+This is the only module that needs NumPy (listed in requirements.txt);
+nothing else imports it, so the game runs without NumPy installed.
+"""
+try:
+    import numpy as np
+except ImportError as error:
+    raise ImportError("batch_evaluation needs NumPy: pip install -r requirements.txt") from error
+from evaluation import CENTER_SCORE, DEFAULT_WEIGHTS
+from neighbors import DISTANCE, SQUARES
+
+_CENTER = np.array(CENTER_SCORE, dtype=np.int32)
+_DISTANCE = np.array(DISTANCE, dtype=np.int32)
+
+def stack_states(states):
+    """Return (heights, workers, turns) arrays for a sequence of GameStates"""
+    count = len(states)
+    heights = np.frombuffer(b"".join(bytes(state.heights) for state in states), dtype=np.uint8)
+    heights = heights.reshape(count, SQUARES)
+    workers = np.array([state.workers for state in states], dtype=np.intp).reshape(count, 4)
+    turns = np.array([state.turn for state in states], dtype=np.int8)
+
+    return heights, workers, turns
+
+def child_arrays(state, turns=None):
+    """Return (heights, workers, turns) arrays for the positions after each turn of state
+
+    turns defaults to state.legal_turns(); row i is the position after turns[i].
+    """
+    if turns is None:
+        turns = state.legal_turns()
+    count = len(turns)
+    moves = np.array(turns, dtype=np.intp).reshape(count, 3)
+    rows = np.arange(count)
+
+    heights = np.tile(np.frombuffer(bytes(state.heights), dtype=np.uint8), (count, 1))
+    heights[rows, moves[:, 2]] += 1
+    workers = np.tile(np.array(state.workers, dtype=np.intp), (count, 1))
+    workers[rows, moves[:, 0]] = moves[:, 1]
+    next_turns = np.full(count, state.turn ^ 1, dtype=np.int8)
+
+    return heights, workers, next_turns
+
+def _side_scores(heights, own, other, weights):
+    height_weight, center_weight, distance_weight, distance_base = weights
+    height_score = np.take_along_axis(heights, own, axis=1).astype(np.int32).sum(axis=1)
+    center_score = _CENTER[own].sum(axis=1)
+    distances = _DISTANCE[other[:, :, None], own[:, None, :]]
+    distance_score = distance_base - distances.min(axis=2).sum(axis=1)
+
+    return height_weight*height_score + center_weight*center_score + distance_weight*distance_score
+
+def move_scores(heights, workers, side, weights=DEFAULT_WEIGHTS):
+    """Return the move score of side (0 white, 1 blue) for every position"""
+    heights = np.asarray(heights)
+    workers = np.asarray(workers, dtype=np.intp)
+    white, blue = workers[:, 0:2], workers[:, 2:4]
+    if side == 0:
+        return _side_scores(heights, white, blue, weights)
+    return _side_scores(heights, blue, white, weights)
+
+def evaluate_batch(heights, workers, turns, weights=DEFAULT_WEIGHTS):
+    """Score every position from the point of view of its side to move"""
+    white = move_scores(heights, workers, 0, weights)
+    blue = move_scores(heights, workers, 1, weights)
+
+    return np.where(np.asarray(turns) == 0, white - blue, blue - white)
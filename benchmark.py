@@ -0,0 +1,52 @@
+"""Compare the cost of copying a position with Board.copy and copy.deepcopy.
+
+    python benchmark.py --number 10000
+
+The board is first played forward a few random turns so that it has
+buildings and a last turn to copy, then each method is timed over the same
+number of copies.
+"""
+import argparse
+import copy
+import random
+import timeit
+from board import Board
+from worker import Worker
+
+def midgame_board(turns=10, seed=0):
+    """Return a board after turns random turns, or fewer if the game ends"""
+    rng = random.Random(seed)
+    board = Board(Worker('A', 3, 1), Worker('B', 1, 3), Worker('Y', 1, 1), Worker('Z', 3, 3))
+    for _ in range(turns):
+        names = ["A", "B"] if board.get_turn() == 0 else ["Y", "Z"]
+        choices = list(board.generate_turns([board.get_worker(name) for name in names]))
+        if not choices:
+            break
+        worker, move, build = rng.choice(choices)
+        board.move(move, worker)
+        board.build(build, worker)
+        if worker.check_height():
+            break
+
+    return board
+
+def run_benchmark(number=10000, turns=10, seed=0):
+    """Return {method: seconds per copy} for Board.copy and copy.deepcopy"""
+    board = midgame_board(turns, seed)
+    results = {}
+    for name, method in (("Board.copy", board.copy), ("copy.deepcopy", lambda: copy.deepcopy(board))):
+        results[name] = timeit.timeit(method, number=number) / number
+
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time Board.copy against copy.deepcopy")
+    parser.add_argument("--number", type=int, default=10000, help="copies per method")
+    parser.add_argument("--turns", type=int, default=10, help="random turns played before copying")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = run_benchmark(args.number, args.turns, args.seed)
+    for name, seconds in results.items():
+        print(f"{name:14} {seconds * 1e6:8.2f} us per copy")
+    print(f"Board.copy is {results['copy.deepcopy'] / results['Board.copy']:.1f}x faster")
@@ -1,5 +1,8 @@
 from space import Space
 from worker import Worker
+from neighbors import OFFSET_MAP, SIZE, MIN_SIZE, board_tables
+from evaluation import center_scores
+from zobrist import WORKER_NAMES, WORKER_INDEX, HEIGHT_KEYS, WORKER_KEYS, SIDE_KEY, hash_position
 
 class ValidDirectionError(Exception):
     pass
@@ -7,28 +10,183 @@ class ValidDirectionError(Exception):
 class ValidMoveError(Exception):
     pass
 
+class NotationError(Exception):
+    pass
+
+SIDES = ("w", "b")
+
 class Board:
 
-    OFFSET_MAP = {'n':[-1, 0], 'ne':[-1, +1], 'e':[0, 1], 'se':[1, 1], 's':[1, 0], 'sw':[1, -1], 'w':[0, -1], 'nw':[-1, -1]}
+    OFFSET_MAP = OFFSET_MAP
 
-    def __init__(self, worker_A, worker_B, worker_Y, worker_Z):
-        self._board_layout = [[Space(0,0), Space(0,1), Space(0,2), Space(0,3), Space(0,4)],
-        [Space(1,0), Space(1,1,worker_Y), Space(1,2), Space(1,3,worker_B), Space(1,4)],
-        [Space(2,0), Space(2,1), Space(2,2), Space(2,3), Space(2,4)],
-        [Space(3,0), Space(3,1,worker_A), Space(3,2), Space(3,3,worker_Z), Space(3,4)], 
-        [Space(4,0), Space(4,1), Space(4,2), Space(4,3), Space(4,4)]]
+    def __init__(self, worker_A, worker_B, worker_Y, worker_Z, size=SIZE):
+        self._set_size(size)
+        self._workers = [worker_A, worker_B, worker_Y, worker_Z]
+        on_square = {worker.get_worker_row() * size + worker.get_worker_col(): worker for worker in self._workers}
+        self._spaces = [Space(square // size, square % size, on_square.get(square)) for square in range(size * size)]
+        self._board_layout = [self._spaces[row * size:(row + 1) * size] for row in range(size)]
+        self._turn = 0
+        self._last_move = None
+        self._last_build = None
+        self._update_hash()
+        self._clear_cache()
     
     def __str__(self):
-        ret_str = ""
+        border = "+--" * self._size + "+"
+        lines = []
         for row in self._board_layout:
-            ret_str += "+--+--+--+--+--+\n"
-            for col in row:
-                ret_str += str(col)
-            ret_str += "|\n"
-        ret_str += "+--+--+--+--+--+"
+            lines.append(border)
+            lines.append("".join([str(col) for col in row]) + "|")
+        lines.append(border)
         
-        return ret_str
-    
+        return "\n".join(lines)
+
+    def copy(self):
+        """Return a copy of the board with its own spaces and workers
+
+        Heights and worker placements are copied directly, which is much
+        cheaper than copy.deepcopy. The copy's workers are new objects; look
+        them up with get_worker.
+        """
+        size = self._size
+        workers = [worker.copy() for worker in self._workers]
+        on_square = {worker.get_worker_row() * size + worker.get_worker_col(): worker for worker in workers}
+
+        spaces = []
+        for square, space in enumerate(self._spaces):
+            clone = Space(space._row, space._col, on_square.get(square))
+            clone._height = space._height
+            spaces.append(clone)
+
+        board = Board.__new__(Board)
+        board._set_size(size)
+        board._spaces = spaces
+        board._board_layout = [spaces[row * size:(row + 1) * size] for row in range(size)]
+        board._workers = workers
+        board._turn = self._turn
+        board._hash = self._hash
+        board._last_build = self._last_build
+        board._last_move = None
+        if self._last_move:
+            worker, start, target = self._last_move
+            board._last_move = (workers[WORKER_INDEX[str(worker)]], start, target)
+        board._generation = self._generation
+        board._stamps = list(self._stamps)
+        board._move_cache = list(self._move_cache)
+        board._build_cache = list(self._build_cache)
+
+        return board
+
+    def _set_size(self, size):
+        """Use the neighbor, distance and center tables of a size x size board"""
+        tables = board_tables(size)
+        self._size = size
+        self._neighbors = tables.neighbors
+        self._neighbor_squares = tables.neighbor_squares
+        self._direction_target = tables.direction_target
+        self._distance = tables.distance
+        self._center = center_scores(size)
+
+    def get_size(self):
+        return self._size
+
+    def _clear_cache(self):
+        """Forget every cached move and build list
+
+        Each square has the generation at which a height or worker changed
+        next to it or on it, and a cached list is only used while that stamp
+        is the one it was computed at.
+        """
+        squares = self._size * self._size
+        self._generation = 0
+        self._stamps = [0] * squares
+        self._move_cache = [None] * squares
+        self._build_cache = [None] * squares
+
+    def _invalidate(self, square):
+        """Start a new generation for the cached lists around a square that changed"""
+        self._generation += 1
+        generation = self._generation
+        stamps = self._stamps
+        stamps[square] = generation
+        for neighbor in self._neighbor_squares[square]:
+            stamps[neighbor] = generation
+
+    def _update_hash(self):
+        """Recalculate the Zobrist key of the position from scratch"""
+        heights = [space.get_height() for space in self._spaces]
+        workers = [worker.get_worker_row() * self._size + worker.get_worker_col() for worker in self._workers]
+        self._hash = hash_position(heights, workers, self._turn)
+
+    @classmethod
+    def from_notation(cls, text):
+        """Create a board from a position written by to_notation
+
+        The notation is the heights row by row with rows separated by '/',
+        the row and column of workers A, B, Y and Z separated by commas and
+        w or b for the side to move, e.g. the start position is
+
+            00000/00000/00000/00000/00000 31,13,11,33 w
+
+        The board size is the number of rows.
+        """
+        fields = text.split()
+        if len(fields) != 3:
+            raise NotationError(f"expected heights, workers and side to move: {text!r}")
+        rows, places, side = fields
+
+        heights = [[int(height) for height in row] for row in rows.split("/") if row.isascii() and row.isdigit()]
+        size = len(heights)
+        if (not MIN_SIZE <= size <= SIZE or len(heights) != len(rows.split("/"))
+                or any(len(row) != size or max(row) > 4 for row in heights)):
+            raise NotationError(f"expected {MIN_SIZE} to {SIZE} rows of as many heights from 0 to 4: {rows!r}")
+
+        places = places.split(",")
+        if (len(places) != len(WORKER_NAMES) or len(set(places)) != len(places)
+                or any(len(place) != 2 or not (place.isascii() and place.isdigit()) or max(place) >= str(size) for place in places)):
+            raise NotationError(f"expected {len(WORKER_NAMES)} different worker squares: {fields[1]!r}")
+        workers = [Worker(name, int(place[0]), int(place[1])) for name, place in zip(WORKER_NAMES, places)]
+        if any(heights[worker.get_worker_row()][worker.get_worker_col()] == 4 for worker in workers):
+            raise NotationError(f"a worker stands on a dome: {fields[1]!r}")
+
+        if side not in SIDES:
+            raise NotationError(f"expected w or b to move: {side!r}")
+
+        board = cls(*workers, size=size)
+        board.set_position(heights, workers, SIDES.index(side))
+        return board
+
+    def to_notation(self):
+        """Write the position as one line that from_notation reads back"""
+        rows = "/".join("".join(str(space.get_height()) for space in row) for row in self._board_layout)
+        places = ",".join(f"{worker.get_worker_row()}{worker.get_worker_col()}" for worker in self._workers)
+        return f"{rows} {places} {SIDES[self._turn]}"
+
+    def get_hash(self):
+        """Return the Zobrist key of the position, kept up to date by move and build"""
+        return self._hash
+
+    def get_turn(self):
+        """Return 0 when white is to move and 1 when blue is to move"""
+        return self._turn
+
+    def set_position(self, heights, workers, turn=0):
+        """Set the height of every space and place workers on their own positions"""
+        for row in self._board_layout:
+            for space in row:
+                pos = space.get_position()
+                space._height = heights[pos[0]][pos[1]]
+                space._worker_on_space = None
+
+        for worker in workers:
+            pos = worker.get_worker_pos()
+            self._board_layout[pos[0]][pos[1]].update_space_after_move(worker)
+
+        self._workers = sorted(workers, key=lambda worker: WORKER_INDEX[str(worker)])
+        self._turn = turn
+        self._update_hash()
+        self._clear_cache()
+
     def _check_input_exceptions(self, move, possible_moves_lst):
         """Check if a move or build is valid"""
         if move not in Board.OFFSET_MAP:
@@ -37,29 +195,80 @@ class Board:
             raise(ValidMoveError)
 
     def find_all_possible_moves(self, pos):
-        """Find all possible moves for a given position"""
-        possible_moves = []
+        """Find all possible moves for a given position
 
-        height = self._board_layout[pos[0]][pos[1]].get_height()
+        The list is cached until the board changes around the position, so it
+        must not be modified.
+        """
+        square = pos[0] * self._size + pos[1]
+        stamp = self._stamps[square]
+        cached = self._move_cache[square]
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
 
-        for key, val in Board.OFFSET_MAP.items():
-            row, col = (pos[0] + val[0]), (pos[1] + val[1])
-            if row >= 0 and row <= 4 and col >= 0 and col <= 4 and self._board_layout[row][col].check_move(height) and self.find_all_possible_builds([row, col]) != None:
-                possible_moves.append(key)
-        
-        return possible_moves
+        spaces = self._spaces
+        height = spaces[square].get_height()
+        moves = [key for key, target in self._neighbors[square] if spaces[target].check_move(height)]
+        self._move_cache[square] = (stamp, moves)
+
+        return moves
     
     def find_all_possible_builds(self, pos):
-        """Find all possible builds for a given position"""
-        possible_builds = []
+        """Find all possible builds for a given position, cached like find_all_possible_moves"""
+        square = pos[0] * self._size + pos[1]
+        stamp = self._stamps[square]
+        cached = self._build_cache[square]
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        spaces = self._spaces
+        builds = [key for key, target in self._neighbors[square] if spaces[target].check_build()]
+        self._build_cache[square] = (stamp, builds)
+
+        return builds
+
+    def generate_turns(self, workers):
+        """Lazily yield every legal (worker, move, build) turn for the given workers
+
+        The board is not changed, so the square a worker leaves counts as
+        buildable. The board must not be changed while the generator is in use.
+        """
+        spaces = self._spaces
+        neighbors = self._neighbors
+        for worker in workers:
+            pos = worker.get_worker_pos()
+            start = pos[0] * self._size + pos[1]
+            height = spaces[start].get_height()
+            for move, target in neighbors[start]:
+                if not spaces[target].check_move(height):
+                    continue
+                for build, build_target in neighbors[target]:
+                    if build_target == start or spaces[build_target].check_build():
+                        yield worker, move, build
+
+    def find_winning_moves(self, workers):
+        """Find the (worker, direction) moves that step a worker from height 2 onto height 3"""
+        spaces = self._spaces
+        winning_moves = []
+        for worker in workers:
+            square = worker.get_worker_row() * self._size + worker.get_worker_col()
+            if spaces[square].get_height() != 2:
+                continue
+            for key, target in self._neighbors[square]:
+                if spaces[target].get_height() == 3 and spaces[target].get_worker() == None:
+                    winning_moves.append((worker, key))
+
+        return winning_moves
+
+    def find_win_threats(self, workers):
+        """Find the positions the given workers could step onto to win on their next move"""
+        threats = []
+        for worker, key in self.find_winning_moves(workers):
+            target = self._direction_target[worker.get_worker_row() * self._size + worker.get_worker_col()][key]
+            threats.append([target // self._size, target % self._size])
+
+        return threats
 
-        for key, val in Board.OFFSET_MAP.items():
-            row, col = (pos[0] + val[0]), (pos[1] + val[1])
-            if row >= 0 and row <= 4 and col >= 0 and col <= 4 and self._board_layout[row][col].check_build():
-                possible_builds.append(key)
-        
-        return possible_builds
-    
     def move(self, move, worker):
         """Move a worker"""
         pos = worker.get_worker_pos()
@@ -67,11 +276,16 @@ class Board:
 
         self._check_input_exceptions(move, possible_moves_lst)
 
-        self._board_layout[pos[0]][pos[1]].update_space_after_move(None)
-
-        row, col = (pos[0] + Board.OFFSET_MAP[move][0]), (pos[1] + Board.OFFSET_MAP[move][1])
+        square = pos[0] * self._size + pos[1]
+        target = self._direction_target[square][move]
+        self._spaces[square].update_space_after_move(None)
+        self._spaces[target].update_space_after_move(worker)
+        self._invalidate(square)
+        self._invalidate(target)
 
-        self._board_layout[row][col].update_space_after_move(worker)
+        worker_keys = WORKER_KEYS[WORKER_INDEX[str(worker)]]
+        self._hash ^= worker_keys[square] ^ worker_keys[target]
+        self._last_move = (worker, square, target)
     
     def build(self, build, worker):
         """Build after a move"""
@@ -80,9 +294,54 @@ class Board:
 
         self._check_input_exceptions(build, possible_moves_lst)
 
-        row, col = (pos[0] + Board.OFFSET_MAP[build][0]), (pos[1] + Board.OFFSET_MAP[build][1])
+        target = self._direction_target[pos[0] * self._size + pos[1]][build]
+        height = self._spaces[target].get_height()
+        self._spaces[target].update_space_after_build()
+        self._invalidate(target)
+
+        self._hash ^= HEIGHT_KEYS[target][height] ^ HEIGHT_KEYS[target][height + 1] ^ SIDE_KEY
+        self._turn ^= 1
+        self._last_build = target
+
+    def get_last_turn(self):
+        """Return (worker, start square, move square, build square) of the last turn played"""
+        worker, start, target = self._last_move
+        return (worker, start, target, self._last_build)
+
+    def revert_turn(self, worker, start, target, build=None):
+        """Take back a turn returned by get_last_turn, in place and without checks
+
+        With build None only the move is taken back, for a turn that has no
+        build yet.
+        """
+        worker_keys = WORKER_KEYS[WORKER_INDEX[str(worker)]]
+        if build != None:
+            height = self._spaces[build].get_height()
+            self._spaces[build]._height = height - 1
+            self._invalidate(build)
+            self._hash ^= HEIGHT_KEYS[build][height] ^ HEIGHT_KEYS[build][height - 1] ^ SIDE_KEY
+            self._turn ^= 1
+
+        self._spaces[target].update_space_after_move(None)
+        self._spaces[start].update_space_after_move(worker)
+        self._invalidate(start)
+        self._invalidate(target)
+        self._hash ^= worker_keys[start] ^ worker_keys[target]
 
-        self._board_layout[row][col].update_space_after_build()
+    def replay_turn(self, worker, start, target, build):
+        """Play a turn returned by get_last_turn again, in place and without checks"""
+        self._spaces[start].update_space_after_move(None)
+        self._spaces[target].update_space_after_move(worker)
+        height = self._spaces[build].get_height()
+        self._spaces[build].update_space_after_build()
+        self._invalidate(start)
+        self._invalidate(target)
+        self._invalidate(build)
+
+        worker_keys = WORKER_KEYS[WORKER_INDEX[str(worker)]]
+        self._hash ^= (worker_keys[start] ^ worker_keys[target]
+                       ^ HEIGHT_KEYS[build][height] ^ HEIGHT_KEYS[build][height + 1] ^ SIDE_KEY)
+        self._turn ^= 1
     
     def find_height_score(self, pos1, pos2):
         height1 = self._board_layout[pos1[0]][pos1[1]].get_height()
@@ -96,42 +355,29 @@ class Board:
 
         return (score1 + score2)
     
-    def find_distance_score(self, current_pos_lst, other_pos_lst):
+    def find_distance_score(self, current_pos_lst, other_pos_lst, base=8):
         min_distance1 = self._find_distance(other_pos_lst[0], current_pos_lst)
         min_distance2 = self._find_distance(other_pos_lst[1], current_pos_lst)
         
-        return (8 - (min_distance1 + min_distance2))
+        return (base - (min_distance1 + min_distance2))
     
     def _find_distance(self, other_pos, current_pos_lst):
-        min_distance = -1
-        for current_pos in current_pos_lst:
-            distance = max(abs(current_pos[0] - other_pos[0]), abs(current_pos[1] - other_pos[1]))
-            if min_distance == -1 or min_distance > distance:
-                min_distance = distance
+        size = self._size
+        distances = self._distance[other_pos[0] * size + other_pos[1]]
         
-        return min_distance
+        return min(distances[current_pos[0] * size + current_pos[1]] for current_pos in current_pos_lst)
     
     def _check_center(self, pos):
         """Check if a worker is in the center"""
-        if [pos[0], pos[1]] == [2, 2]:
-            return 2
-        elif [pos[0], pos[1]] in [[1,1], [1,2], [1,3], [2,1], [2,3], [3,1], [3,2], [3,3]]:
-            return 1
-        else:
-            return 0
+        return self._center[pos[0] * self._size + pos[1]]
     
+    def find_other_workers(self, current_workers):
+        """Find the other player's workers"""
+        return [worker for worker in self._workers if worker not in current_workers]
+
     def find_other_workers_pos(self, current_workers):
         """Find the positions of the other player's workers"""
-        pos = []
-        for row in self._board_layout:
-            for space in row:
-                if space.get_worker() != None and space.get_worker() not in current_workers:
-                    pos.append(space.get_position())
-        
-        return pos
+        return [worker.get_worker_pos() for worker in self.find_other_workers(current_workers)]
 
     def get_worker(self, name):
-        for row in self._board_layout:
-            for space in row:
-                if str(space._worker_on_space) == name:
-                    return space._worker_on_space
\ No newline at end of file
+        return self._workers[WORKER_INDEX[name]]
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""Position evaluation shared by the search-based players.
+
+The terms and weights are the ones used by Player.calculate_move_score:
+3 * height + 2 * center + 1 * distance for a pair of workers by default, where
+the distance term is 8 minus the distances from the other workers. Weights are
+(height, center, distance, distance base) tuples and can be saved to and
+loaded from JSON files.
+"""
+import json
+from functools import lru_cache
+from neighbors import DISTANCE, SIZE
+
+WEIGHT_NAMES = ("height", "center", "distance", "distance_base")
+DEFAULT_WEIGHTS = (3, 2, 1, 8)
+
+def load_weights(path):
+    """Read weights written by save_weights, with defaults for missing terms"""
+    with open(path) as f:
+        values = json.load(f)
+    return tuple(values.get(name, default) for name, default in zip(WEIGHT_NAMES, DEFAULT_WEIGHTS))
+
+def save_weights(path, weights):
+    with open(path, "w") as f:
+        json.dump(dict(zip(WEIGHT_NAMES, weights)), f, indent=2)
+
+def _center_value(square, size):
+    row, col = divmod(square, size)
+    # rings around the middle square, or the middle four squares of an even board
+    ring = max(abs(2 * row - (size - 1)), abs(2 * col - (size - 1))) // 2
+    return max(0, 2 - ring)
+
+@lru_cache(maxsize=None)
+def center_scores(size=SIZE):
+    """Return the center score of every square of a size x size board"""
+    return tuple(_center_value(sq, size) for sq in range(size * size))
+
+# CENTER_SCORE[sq] -> 2 for the middle square, 1 for the ring around it, 0 otherwise
+CENTER_SCORE = center_scores(SIZE)
+
+def score_workers(heights, own1, own2, other1, other2, weights=DEFAULT_WEIGHTS):
+    """Calculate the move score of the workers on own1 and own2 against the workers on other1 and other2"""
+    height_weight, center_weight, distance_weight, distance_base = weights
+    height_score = heights[own1] + heights[own2]
+    center_score = CENTER_SCORE[own1] + CENTER_SCORE[own2]
+    distance_score = distance_base - (min(DISTANCE[other1][own1], DISTANCE[other1][own2])
+                                      + min(DISTANCE[other2][own1], DISTANCE[other2][own2]))
+
+    return height_weight*height_score + center_weight*center_score + distance_weight*distance_score
+
+def evaluate(state, weights=DEFAULT_WEIGHTS):
+    """Score a GameState from the point of view of the side to move"""
+    a, b, y, z = state.workers
+    heights = state.heights
+    white = score_workers(heights, a, b, y, z, weights)
+    blue = score_workers(heights, y, z, a, b, weights)
+
+    return white - blue if state.turn == 0 else blue - white
+
+class Evaluator:
+    """Keep the height and center terms of both players up to date for a GameState
+
+    Turns must be applied through make/unmake so the running sums follow the
+    state. Builds never change the height under a worker, so only the moving
+    worker's squares touch the sums, and the distance term is four table
+    lookups, which makes every query O(1).
+    """
+
+    def __init__(self, state, weights=DEFAULT_WEIGHTS):
+        self.state = state
+        self.weights = weights
+        heights = state.heights
+        a, b, y, z = state.workers
+        self.height_scores = [heights[a] + heights[b], heights[y] + heights[z]]
+        self.center_scores = [CENTER_SCORE[a] + CENTER_SCORE[b], CENTER_SCORE[y] + CENTER_SCORE[z]]
+
+    def make(self, turn):
+        worker, to, build = turn
+        state = self.state
+        start = state.workers[worker]
+        side = worker >> 1
+        self.height_scores[side] += state.heights[to] - state.heights[start]
+        self.center_scores[side] += CENTER_SCORE[to] - CENTER_SCORE[start]
+        state.make(turn)
+
+    def unmake(self, turn):
+        worker, to, build = turn
+        state = self.state
+        state.unmake(turn)
+        start = state.workers[worker]
+        side = worker >> 1
+        self.height_scores[side] -= state.heights[to] - state.heights[start]
+        self.center_scores[side] -= CENTER_SCORE[to] - CENTER_SCORE[start]
+
+    def _distance_score(self, own1, own2, other1, other2):
+        return self.weights[3] - (min(DISTANCE[other1][own1], DISTANCE[other1][own2])
+                    + min(DISTANCE[other2][own1], DISTANCE[other2][own2]))
+
+    def score(self, side):
+        """Return the move score of side (0 white, 1 blue) in the current position"""
+        workers = self.state.workers
+        if side == 0:
+            distance_score = self._distance_score(*workers)
+        else:
+            distance_score = self._distance_score(workers[2], workers[3], workers[0], workers[1])
+
+        height_weight, center_weight, distance_weight, _ = self.weights
+        return (height_weight*self.height_scores[side] + center_weight*self.center_scores[side]
+                + distance_weight*distance_score)
+
+    def move_score(self, worker, to):
+        """Return the move score of the worker's side if worker stood on square to"""
+        state = self.state
+        workers = state.workers
+        start = workers[worker]
+        side = worker >> 1
+        partner = workers[worker ^ 1]
+        other1, other2 = workers[2 - 2 * side], workers[3 - 2 * side]
+
+        height_score = self.height_scores[side] - state.heights[start] + state.heights[to]
+        center_score = self.center_scores[side] - CENTER_SCORE[start] + CENTER_SCORE[to]
+
+        height_weight, center_weight, distance_weight, _ = self.weights
+        return (height_weight*height_score + center_weight*center_score
+                + distance_weight*self._distance_score(to, partner, other1, other2))
+
+    def evaluate(self):
+        """Score the position from the point of view of the side to move"""
+        side = self.state.turn
+        return self.score(side) - self.score(side ^ 1)
@@ -0,0 +1,111 @@
+"""Game event sinks.
+
+The game loop and the players report what happens through an EventSink
+instead of printing. TerminalSink prints the same text the game always
+printed, BufferedSink keeps the events to format later and NullSink drops
+them, so nothing is formatted when nobody is listening.
+"""
+import sys
+from abc import ABC, abstractmethod
+from neighbors import SIZE
+from state import GameState
+
+class EventSink(ABC):
+    """Observer interface for game events"""
+
+    @abstractmethod
+    def turn_played(self, player, worker, move, build):
+        """A player moved worker in direction move and built in direction build"""
+        pass
+
+    @abstractmethod
+    def board_changed(self, board, turn, player, scores=None):
+        """The board is ready for turn number turn of player
+
+        scores is the (height, center, distance) score of player when score
+        display is on, otherwise None.
+        """
+        pass
+
+    @abstractmethod
+    def game_over(self, winner):
+        """The player with color winner has won"""
+        pass
+
+def format_turn(player, worker, move, build):
+    return f"{worker},{move},{build}"
+
+def format_board(board, turn, player, scores=None):
+    if scores:
+        return f"{board}\nTurn: {turn}, {player}, ({scores[0]}, {scores[1]}, {scores[2]})"
+    return f"{board}\nTurn: {turn}, {player}"
+
+def format_game_over(winner):
+    return f"{winner} has won"
+
+class TerminalSink(EventSink):
+    """Print every event as the game always has"""
+
+    def __init__(self, stream=None):
+        self._stream = stream
+
+    def _write(self, text):
+        print(text, file=self._stream or sys.stdout)
+
+    def turn_played(self, player, worker, move, build):
+        self._write(format_turn(player, worker, move, build))
+
+    def board_changed(self, board, turn, player, scores=None):
+        self._write(format_board(board, turn, player, scores))
+
+    def game_over(self, winner):
+        self._write(format_game_over(winner))
+
+class BufferedSink(EventSink):
+    """Keep events unformatted in memory until lines or write_to is called
+
+    Full size boards are kept as compact GameState snapshots and only
+    rendered when the events are formatted; smaller boards are rendered
+    right away.
+    """
+
+    def __init__(self):
+        self.events = []
+
+    def turn_played(self, player, worker, move, build):
+        self.events.append(("turn_played", str(player), str(worker), move, build))
+
+    def board_changed(self, board, turn, player, scores=None):
+        snapshot = GameState.from_board(board, board.get_turn()) if board.get_size() == SIZE else str(board)
+        self.events.append(("board_changed", snapshot, turn, str(player), scores))
+
+    def game_over(self, winner):
+        self.events.append(("game_over", winner))
+
+    def lines(self):
+        """Yield the events formatted one per line"""
+        for event in self.events:
+            if event[0] == "turn_played":
+                yield format_turn(*event[1:])
+            elif event[0] == "board_changed":
+                yield format_board(*event[1:])
+            else:
+                yield format_game_over(event[1])
+
+    def write_to(self, stream):
+        stream.write("".join(line + "\n" for line in self.lines()))
+
+    def clear(self):
+        self.events = []
+
+class NullSink(EventSink):
+    """Drop every event"""
+
+    def turn_played(self, player, worker, move, build):
+        pass
+
+    def board_changed(self, board, turn, player, scores=None):
+        pass
+
+    def game_over(self, winner):
+        pass
@@ -1,4 +1,4 @@
-from player import HumanPlayer, RandomPlayer, HeuristicPlayer
+from player import HumanPlayer, RandomPlayer, HeuristicPlayer, SearchPlayer, MCTSPlayer
 
 class PlayerFactory:
     """Abstract Factory for creating blue and white player"""
@@ -11,22 +11,52 @@ class PlayerFactory:
     def create_heuristic_player():
         pass
 
+    def create_search_player():
+        pass
+
+    def create_mcts_player():
+        pass
+
 class WhitePlayerFactory(PlayerFactory):
-    def create_human_player(worker1, worker2, board):
-        return HumanPlayer([worker1, worker2], "white", board)
+    def create_human_player(worker1, worker2, board, **kwargs):
+        return HumanPlayer([worker1, worker2], "white", board, **kwargs)
+    
+    def create_random_player(worker1, worker2, board, **kwargs):
+        return RandomPlayer([worker1, worker2], "white", board, **kwargs)
     
-    def create_random_player(worker1, worker2, board):
-        return RandomPlayer([worker1, worker2], "white", board)
+    def create_heuristic_player(worker1, worker2, board, **kwargs):
+        return HeuristicPlayer([worker1, worker2], "white", board, **kwargs)
     
-    def create_heuristic_player(worker1, worker2, board):
-        return HeuristicPlayer([worker1, worker2], "white", board)
+    def create_search_player(worker1, worker2, board, **kwargs):
+        return SearchPlayer([worker1, worker2], "white", board, **kwargs)
+    
+    def create_mcts_player(worker1, worker2, board, **kwargs):
+        return MCTSPlayer([worker1, worker2], "white", board, **kwargs)
 
 class BluePlayerFactory(PlayerFactory):
-    def create_human_player(worker1, worker2, board):
-        return HumanPlayer([worker1, worker2], "blue", board)
+    def create_human_player(worker1, worker2, board, **kwargs):
+        return HumanPlayer([worker1, worker2], "blue", board, **kwargs)
+    
+    def create_random_player(worker1, worker2, board, **kwargs):
+        return RandomPlayer([worker1, worker2], "blue", board, **kwargs)
+    
+    def create_heuristic_player(worker1, worker2, board, **kwargs):
+        return HeuristicPlayer([worker1, worker2], "blue", board, **kwargs)
     
-    def create_random_player(worker1, worker2, board):
-        return RandomPlayer([worker1, worker2], "blue", board)
+    def create_search_player(worker1, worker2, board, **kwargs):
+        return SearchPlayer([worker1, worker2], "blue", board, **kwargs)
     
-    def create_heuristic_player(worker1, worker2, board):
-        return HeuristicPlayer([worker1, worker2], "blue", board)
\ No newline at end of file
+    def create_mcts_player(worker1, worker2, board, **kwargs):
+        return MCTSPlayer([worker1, worker2], "blue", board, **kwargs)
+
+def create_player(factory, player_type, worker1, worker2, board, **kwargs):
+    """Create a player of the given type with a color factory, defaulting to heuristic
+
+    Extra keyword arguments such as weights are passed on to the player.
+    """
+    creators = {"human": factory.create_human_player,
+                "random": factory.create_random_player,
+                "heuristic": factory.create_heuristic_player,
+                "search": factory.create_search_player,
+                "mcts": factory.create_mcts_player}
+    return creators.get(player_type, factory.create_heuristic_player)(worker1, worker2, board, **kwargs)
\ No newline at end of file
@@ -1,34 +1,31 @@
 import sys
 from board import Board
-from player import HumanPlayer, RandomPlayer, HeuristicPlayer, ValidWorkerError, OtherWorkerError
+from player import Player, HumanPlayer, RandomPlayer, HeuristicPlayer, SearchPlayer, MCTSPlayer, ValidWorkerError, OtherWorkerError
 from worker import Worker
-from factory import WhitePlayerFactory, BluePlayerFactory
+from factory import WhitePlayerFactory, BluePlayerFactory, create_player
 from memento import Memento, ConcreteMemento, Caretaker
-from copy import deepcopy
+from opening_book import OpeningBook
+from events import TerminalSink
+from neighbors import MIN_SIZE, SIZE, start_positions
+from evaluation import load_weights
 
 class MainCLI:
     """Display a menu for the game and respond to choices when run."""
-    def __init__(self, player1, player2, undo_redo, score):
-        self._worker_A = Worker('A', 3, 1)
-        self._worker_B = Worker('B', 1, 3)
-        self._worker_Y = Worker('Y', 1, 1)
-        self._worker_Z = Worker('Z', 3, 3)
-
-        self._board = Board(self._worker_A, self._worker_B, self._worker_Y, self._worker_Z)
-
-        if player1 == "human":
-            self._white_player = WhitePlayerFactory.create_human_player(self._worker_A, self._worker_B, self._board)
-        elif player1 == "random":
-            self._white_player = WhitePlayerFactory.create_random_player(self._worker_A, self._worker_B, self._board)
-        else:
-            self._white_player = WhitePlayerFactory.create_heuristic_player(self._worker_A, self._worker_B, self._board)
-        
-        if player2 == "human":
-            self._blue_player = BluePlayerFactory.create_human_player(self._worker_Y, self._worker_Z, self._board)
-        elif player2 == "random":
-            self._blue_player = BluePlayerFactory.create_random_player(self._worker_Y, self._worker_Z, self._board)
-        else:
-            self._blue_player = BluePlayerFactory.create_heuristic_player(self._worker_Y, self._worker_Z, self._board)
+    def __init__(self, player1, player2, undo_redo, score, events=None, size=SIZE):
+        start_A, start_B, start_Y, start_Z = start_positions(size)
+        self._worker_A = Worker('A', *start_A)
+        self._worker_B = Worker('B', *start_B)
+        self._worker_Y = Worker('Y', *start_Y)
+        self._worker_Z = Worker('Z', *start_Z)
+
+        self._board = Board(self._worker_A, self._worker_B, self._worker_Y, self._worker_Z, size)
+
+        self._white_player = create_player(WhitePlayerFactory, player1, self._worker_A, self._worker_B, self._board)
+        self._blue_player = create_player(BluePlayerFactory, player2, self._worker_Y, self._worker_Z, self._board)
+
+        self._events = TerminalSink() if events is None else events
+        self._white_player.set_events(self._events)
+        self._blue_player.set_events(self._events)
 
         self._current_player = self._white_player
         self._other_player = self._blue_player
@@ -37,19 +34,17 @@ class MainCLI:
         self._undo_redo = undo_redo
         self._score = score
 
-        self._state = self._board
         self._caretaker = Caretaker(self)
 
 
     def _display_MainCLI(self):
         """Display the game in terminal"""
         while True:
-            print(self._board)
+            scores = None
             if self._score:
                 self._current_player.calculate_move_score()
-                print(f"Turn: {self._turn}, {self._current_player}, ({self._current_player.height_score}, {self._current_player.center_score}, {self._current_player.distance_score})")
-            else:
-                print(f"Turn: {self._turn}, {self._current_player}")
+                scores = (self._current_player.height_score, self._current_player.center_score, self._current_player.distance_score)
+            self._events.board_changed(self._board, self._turn, self._current_player, scores)
             
             if self._check_end_of_game():
                 break
@@ -64,10 +59,19 @@ class MainCLI:
                     if self._caretaker.redo():
                         self._update_game(1)
                     continue
-                else:
-                    self._caretaker.next()
 
-            self._current_player.take_turn()
+            # an AI player thinks about its answer while a human decides
+            pondering = isinstance(self._current_player, HumanPlayer)
+            if pondering:
+                self._other_player.start_pondering()
+            try:
+                self._current_player.take_turn()
+            finally:
+                if pondering:
+                    self._other_player.stop_pondering()
+
+            if self._undo_redo:
+                self._caretaker.next()
 
             self._update_current_player()
             self._turn += 1
@@ -78,9 +82,6 @@ class MainCLI:
     
     def _update_game(self, num):
         """Update the game after an undo or redo"""
-        self._board = self._state
-        self._board._board_layout = self._state._board_layout
-        self._update_board_and_workers()
         self._turn += num
         self._update_current_player()
 
@@ -100,43 +101,63 @@ class MainCLI:
         
         return False
     
-    def _update_board_and_workers(self):
-        """Update the board and workers in the Player classes"""
-        worker_A = self._board.get_worker("A")
-        worker_B = self._board.get_worker("B")
-
-        self._worker_A = worker_A
-        self._worker_B = worker_B
-
-        self._white_player.set_workers(worker_A, worker_B)
-
-        worker_Y = self._board.get_worker("Y")
-        worker_Z = self._board.get_worker("Z")
-
-        self._worker_Y = worker_Y
-        self._worker_Z = worker_Z
-
-        self._blue_player.set_workers(worker_Y, worker_Z)
-
-        self._white_player.set_board(self._board)
-        self._blue_player.set_board(self._board)
-    
     def save(self) -> Memento:
         """
-        Saves the current state inside a memento.
+        Saves the last turn played inside a memento.
         """
 
-        return ConcreteMemento(deepcopy(self._state))
+        return ConcreteMemento(self._board.get_last_turn())
 
     def restore(self, memento: Memento):
         """
-        Restores the Originator's state from a memento object.
+        Takes back the turn stored in a memento.
         """
 
-        self._state = memento.get_state()
+        self._board.revert_turn(*memento.get_state())
+
+    def replay(self, memento: Memento):
+        """
+        Plays the turn stored in a memento again.
+        """
+
+        self._board.replay_turn(*memento.get_state())
             
 
 if __name__ == "__main__":
+    book = None
+    if "--book" in sys.argv:
+        index = sys.argv.index("--book")
+        book = sys.argv[index + 1]
+        Player.OPENING_BOOK = OpeningBook(book)
+        del sys.argv[index:index + 2]
+
+    if "--search-processes" in sys.argv:
+        index = sys.argv.index("--search-processes")
+        SearchPlayer.PROCESSES = int(sys.argv[index + 1])
+        del sys.argv[index:index + 2]
+
+    if "--weights" in sys.argv:
+        index = sys.argv.index("--weights")
+        Player.WEIGHTS = load_weights(sys.argv[index + 1])
+        del sys.argv[index:index + 2]
+
+    if "--ponder" in sys.argv:
+        sys.argv.remove("--ponder")
+        SearchPlayer.PONDER = True
+        MCTSPlayer.PONDER = True
+
+    size = SIZE
+    if "--size" in sys.argv:
+        index = sys.argv.index("--size")
+        size = int(sys.argv[index + 1])
+        del sys.argv[index:index + 2]
+
+    profile = None
+    if "--profile" in sys.argv:
+        index = sys.argv.index("--profile")
+        profile = sys.argv[index + 1]
+        del sys.argv[index:index + 2]
+
     player1 = "human"
     if len(sys.argv) >= 2:
         player1 = sys.argv[1]
@@ -151,5 +172,26 @@ if __name__ == "__main__":
     if len(sys.argv) >= 5:
         if sys.argv[4] == "on":
             score = True
+
+    if not MIN_SIZE <= size <= SIZE:
+        sys.exit(f"main.py: error: --size must be from {MIN_SIZE} to {SIZE}")
+    if size != SIZE:
+        # the search players and the opening book only know the full size board
+        if book is not None:
+            sys.exit(f"main.py: error: --book needs a {SIZE}x{SIZE} board")
+        for player_type in (player1, player2):
+            if player_type in ("search", "mcts"):
+                sys.exit(f"main.py: error: {player_type} players need a {SIZE}x{SIZE} board")
     
-    MainCLI(player1, player2, undo_redo, score).run()
\ No newline at end of file
+    if profile:
+        from profiling import Profiler, HOT_PATHS
+        profiler = Profiler()
+        profiler.enable(HOT_PATHS + [(MainCLI, "save"), (MainCLI, "restore"), (MainCLI, "replay"),
+                                     (MainCLI, "_check_end_of_game")])
+        try:
+            MainCLI(player1, player2, undo_redo, score, size=size).run()
+        finally:
+            profiler.disable()
+            profiler.write_report(profile)
+    else:
+        MainCLI(player1, player2, undo_redo, score, size=size).run()
\ No newline at end of file
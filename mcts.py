@@ -0,0 +1,205 @@
+"""Monte Carlo tree search over GameState full turns."""
+import math
+import random
+import time
+from multiprocessing import Pool
+from evaluation import Evaluator, DEFAULT_WEIGHTS
+from state import GameState
+
+EXPLORATION = math.sqrt(2)
+
+class Node:
+    """A position in the tree, reached by turn, with results from mover's point of view"""
+
+    def __init__(self, parent, turn, state):
+        self.parent = parent
+        self.turn = turn
+        self.mover = state.turn ^ 1
+        self.children = []
+        self.visits = 0
+        self.wins = 0.0
+
+        self.winner = None
+        self.untried = []
+        if turn is not None and state.heights[state.workers[turn[0]]] == 3:
+            self.winner = self.mover
+            return
+
+        turns = state.legal_turns()
+        if not turns:
+            self.winner = self.mover
+            return
+
+        # a move onto height 3 wins on the spot, so the other turns need no search
+        heights = state.heights
+        for candidate in turns:
+            if heights[candidate[1]] == 3:
+                turns = [candidate]
+                break
+        self.untried = turns
+
+    def select_child(self):
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: child.wins / child.visits
+                   + EXPLORATION * math.sqrt(log_visits / child.visits))
+
+class MCTS:
+    """UCT search with random or lightly heuristic playouts
+
+    The search stops after iterations playouts or time_limit seconds,
+    whichever comes first; at least one of them must be set. With the
+    "heuristic" playout policy a side takes a winning move when it has one
+    and otherwise the move with the best calculate_move_score terms with
+    probability greedy, or a random move, scoring moves with weights. An
+    optional threading.Event interrupt stops the search early when it is set
+    from another thread.
+    """
+
+    POLICIES = ("random", "heuristic")
+
+    def __init__(self, iterations=None, time_limit=1.0, playout="heuristic", greedy=0.5, seed=None, interrupt=None,
+                 weights=DEFAULT_WEIGHTS):
+        if iterations is None and time_limit is None:
+            raise ValueError("MCTS needs an iteration or time budget")
+        if playout not in MCTS.POLICIES:
+            raise ValueError(f"unknown playout policy {playout}")
+
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.playout = playout
+        self.greedy = greedy
+        self._random = random.Random(seed)
+        self.interrupt = interrupt
+        self.weights = weights
+
+        self.playouts = 0
+
+    def _playout(self, state):
+        """Play random turns from state until a side wins and return the winner"""
+        rand = self._random
+        heuristic = self.playout == "heuristic"
+        evaluator = Evaluator(state, self.weights) if heuristic else None
+        heights = state.heights
+        workers = state.workers
+        while True:
+            moves = [(worker, to) for worker in state.current_workers() for to in state.find_moves(worker)]
+            if not moves:
+                return state.turn ^ 1
+
+            for worker, to in moves:
+                if heights[to] == 3:
+                    return state.turn
+
+            if heuristic and rand.random() < self.greedy:
+                worker, to = max(moves, key=lambda move: evaluator.move_score(*move))
+            else:
+                worker, to = rand.choice(moves)
+
+            start = workers[worker]
+            workers[worker] = to
+            build = rand.choice(state.find_builds(to))
+            workers[worker] = start
+
+            if heuristic:
+                evaluator.make((worker, to, build))
+            else:
+                state.make((worker, to, build))
+
+    def run(self, state):
+        """Search from state and return {turn: (visits, wins)} for the root turns"""
+        root = Node(None, None, state)
+        deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        rand = self._random
+        rand.shuffle(root.untried)
+
+        self.playouts = 0
+        while self.iterations is None or self.playouts < self.iterations:
+            if deadline is not None and self.playouts > 0 and time.perf_counter() > deadline:
+                break
+            if self.interrupt is not None and self.playouts > 0 and self.interrupt.is_set():
+                break
+
+            node = root
+            search_state = state.copy()
+            while not node.untried and node.children:
+                node = node.select_child()
+                search_state.make(node.turn)
+
+            if node.untried:
+                turn = node.untried.pop()
+                search_state.make(turn)
+                child = Node(node, turn, search_state)
+                rand.shuffle(child.untried)
+                node.children.append(child)
+                node = child
+
+            winner = node.winner if node.winner is not None else self._playout(search_state)
+            self.playouts += 1
+
+            while node is not None:
+                node.visits += 1
+                if winner == node.mover:
+                    node.wins += 1
+                node = node.parent
+
+        return {child.turn: (child.visits, child.wins) for child in root.children}
+
+    def find_best_turn(self, state):
+        """Return the most visited root turn, or None if there is no legal turn"""
+        return best_turn(self.run(state))
+
+def best_turn(stats):
+    """Return the turn with the most visits from {turn: (visits, wins)}"""
+    if not stats:
+        return None
+    return max(stats, key=lambda turn: stats[turn])
+
+def _run_tree(task):
+    heights, workers, turn, iterations, time_limit, playout, greedy, seed, weights = task
+    search = MCTS(iterations, time_limit, playout, greedy, seed, weights=weights)
+    return search.run(GameState(heights, workers, turn))
+
+class RootParallelMCTS:
+    """Run independent MCTS trees in a process pool and merge their root visit counts
+
+    The pool is started on first use and kept for later searches; call close
+    when done with it.
+    """
+
+    def __init__(self, processes, iterations=None, time_limit=1.0, playout="heuristic", greedy=0.5, seed=None,
+                 weights=DEFAULT_WEIGHTS):
+        self.processes = processes
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.playout = playout
+        self.greedy = greedy
+        self._random = random.Random(seed)
+        self.weights = weights
+        self._pool = None
+
+    def run(self, state):
+        """Search from state in every process and return the merged {turn: (visits, wins)}"""
+        if self._pool is None:
+            self._pool = Pool(self.processes)
+
+        iterations = None if self.iterations is None else -(-self.iterations // self.processes)
+        tasks = [(bytes(state.heights), list(state.workers), state.turn, iterations, self.time_limit,
+                  self.playout, self.greedy, self._random.getrandbits(32), self.weights) for _ in range(self.processes)]
+
+        merged = {}
+        for stats in self._pool.map(_run_tree, tasks):
+            for turn, (visits, wins) in stats.items():
+                total_visits, total_wins = merged.get(turn, (0, 0.0))
+                merged[turn] = (total_visits + visits, total_wins + wins)
+
+        return merged
+
+    def find_best_turn(self, state):
+        """Return the most visited root turn over all trees, or None if there is no legal turn"""
+        return best_turn(self.run(state))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
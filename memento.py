@@ -44,6 +44,9 @@ class Caretaker():
     The Caretaker doesn't depend on the Concrete Memento class. Therefore, it
     doesn't have access to the originator's state, stored inside the memento. It
     works with all mementos via the base Memento interface.
+
+    Each memento holds one turn, so undo and redo take the turn back or play
+    it again in place instead of swapping in a copy of the whole game.
     """
 
     def __init__(self, originator) -> None:
@@ -58,12 +61,9 @@ class Caretaker():
         if not len(self._mementos):
             return False
         
-        self._redos.append(self._originator.save())
         memento = self._mementos.pop()
-        try:
-            self._originator.restore(memento)
-        except Exception:
-            self.undo()
+        self._originator.restore(memento)
+        self._redos.append(memento)
         
         return True
     
@@ -71,15 +71,12 @@ class Caretaker():
         if not len(self._redos):
             return False
         
-        self._mementos.append(self._originator.save())
         redo = self._redos.pop()
-        try:
-            self._originator.restore(redo)
-        except Exception:
-            self.redo()
+        self._originator.replay(redo)
+        self._mementos.append(redo)
         
         return True
     
     def next(self):
         self.backup()
-        self._redos = []
+        self._redos = []
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""Precomputed adjacency tables for square boards, 5x5 by default.
+
+Squares are indexed as row * size + col. The tables for a size are built
+once and shared by Board, Space, Player and GameState so move and build
+generation are plain lookups. The module constants are the tables of the
+standard 5x5 board; board_tables returns them for the smaller boards.
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+SIZE = 5
+SQUARES = SIZE * SIZE
+# the smallest board that fits four workers with room to move
+MIN_SIZE = 3
+
+OFFSET_MAP = {'n':[-1, 0], 'ne':[-1, +1], 'e':[0, 1], 'se':[1, 1], 's':[1, 0], 'sw':[1, -1], 'w':[0, -1], 'nw':[-1, -1]}
+
+# NEIGHBORS[sq] -> ((direction, square), ...) in OFFSET_MAP order
+# DIRECTION_TARGET[sq] -> {direction: square} for directions that stay on the board
+# NEIGHBOR_SQUARES[sq] -> (square, ...)
+# TARGET_DIRECTION[sq] -> {square: direction}, the inverse of DIRECTION_TARGET
+# DISTANCE[sq1][sq2] -> number of king steps between two squares
+BoardTables = namedtuple("BoardTables", ["size", "squares", "neighbors", "direction_target", "neighbor_squares",
+                                         "target_direction", "distance"])
+
+@lru_cache(maxsize=None)
+def board_tables(size=SIZE):
+    """Return the BoardTables of a size x size board"""
+    if not MIN_SIZE <= size <= SIZE:
+        raise ValueError(f"board size must be from {MIN_SIZE} to {SIZE}: {size}")
+
+    squares = size * size
+    neighbors = []
+    directions = []
+    for sq in range(squares):
+        row, col = divmod(sq, size)
+        adjacent = []
+        for key, val in OFFSET_MAP.items():
+            r, c = row + val[0], col + val[1]
+            if 0 <= r < size and 0 <= c < size:
+                adjacent.append((key, r * size + c))
+        neighbors.append(tuple(adjacent))
+        directions.append(dict(adjacent))
+
+    neighbor_squares = tuple(tuple(nsq for _, nsq in adjacent) for adjacent in neighbors)
+    target_direction = tuple({target: key for key, target in adjacent} for adjacent in neighbors)
+    distance = tuple(tuple(max(abs(sq1 // size - sq2 // size), abs(sq1 % size - sq2 % size)) for sq2 in range(squares))
+                     for sq1 in range(squares))
+
+    return BoardTables(size, squares, tuple(neighbors), tuple(directions), neighbor_squares, target_direction, distance)
+
+def start_positions(size=SIZE):
+    """Return the starting [row, col] of workers A, B, Y and Z on a size x size board
+
+    The workers stand diagonally one square in from the corners, or in the
+    corners of boards too small for that.
+    """
+    near = 1 if size > 3 else 0
+    far = size - 1 - near
+    return [[far, near], [near, far], [near, near], [far, far]]
+
+_TABLES = board_tables(SIZE)
+NEIGHBORS = _TABLES.neighbors
+DIRECTION_TARGET = _TABLES.direction_target
+NEIGHBOR_SQUARES = _TABLES.neighbor_squares
+TARGET_DIRECTION = _TABLES.target_direction
+DISTANCE = _TABLES.distance
+
+def to_square(pos):
+    return pos[0] * SIZE + pos[1]
+
+def to_pos(square):
+    return list(divmod(square, SIZE))
@@ -0,0 +1,142 @@
+"""Opening book built from recorded self-play games.
+
+    python opening_book.py games.rec book.bin --plies 8 --min-games 5
+
+The builder walks the first plies of every game in one or more record files
+and counts, per position, how often each turn was played and won. Positions
+are stored under their canonical (symmetry-reduced) key with the turn in the
+canonical frame, so the 8 symmetric images share one entry.
+
+The book file is MAGIC, a version byte and an entry count, followed by fixed
+width entries sorted by key:
+
+    key (uint64), best turn (uint16), games from the position (uint32),
+    games with the best turn (uint32), wins with the best turn (uint32)
+
+OpeningBook maps the file on first lookup and finds entries by binary search.
+"""
+import argparse
+import mmap
+import os
+import struct
+from record import GameRecordReader
+from symmetry import canonicalize, to_canonical_turn, from_canonical_turn
+from transposition import encode_turn, decode_turn
+from zobrist import hash_position
+
+MAGIC = b"SNTB"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sBI")
+ENTRY = struct.Struct("<QHIII")
+
+class BookFormatError(Exception):
+    pass
+
+def _canonical(state):
+    canonical, transform = canonicalize(state)
+    return canonical, transform, hash_position(canonical.heights, canonical.workers, canonical.turn)
+
+def build_book(record_paths, book_path, plies=8, min_games=5):
+    """Aggregate the opening turns of recorded games into a book file and return its entry count
+
+    A position gets an entry once it was reached in at least min_games games;
+    its best turn is the one with the highest win rate, counting one extra
+    win and loss for every turn so rarely played turns are not favoured.
+    """
+    stats = {}
+    for path in record_paths:
+        with GameRecordReader(path) as reader:
+            for game in reader:
+                if game.winner is None:
+                    continue
+                for ply, (state, turn) in enumerate(game.positions()):
+                    if ply >= plies:
+                        break
+                    canonical, transform, key = _canonical(state)
+                    code = encode_turn(to_canonical_turn(state, turn, transform, canonical))
+                    turns = stats.setdefault(key, {})
+                    games, wins = turns.get(code, (0, 0))
+                    turns[code] = (games + 1, wins + (1 if game.winner == state.turn else 0))
+
+    entries = []
+    for key, turns in stats.items():
+        total = sum(games for games, _ in turns.values())
+        if total < min_games:
+            continue
+        code, (games, wins) = max(turns.items(), key=lambda item: ((item[1][1] + 1) / (item[1][0] + 2), item[1][0]))
+        entries.append((key, code, total, games, wins))
+    entries.sort()
+
+    with open(book_path, "wb") as book:
+        book.write(FILE_HEADER.pack(MAGIC, VERSION, len(entries)))
+        book.write(b"".join(ENTRY.pack(*entry) for entry in entries))
+
+    return len(entries)
+
+class OpeningBook:
+    """Look up book turns for GameStates; the file is opened on first use"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._map = None
+        self._count = 0
+
+    def _open(self):
+        self._file = open(self.path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < FILE_HEADER.size:
+            raise BookFormatError(f"{self.path} is not an opening book")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = FILE_HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or size != FILE_HEADER.size + count * ENTRY.size:
+            raise BookFormatError(f"{self.path} is not a version {VERSION} opening book")
+        self._count = count
+
+    def _find(self, key):
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            entry = ENTRY.unpack_from(self._map, FILE_HEADER.size + middle * ENTRY.size)
+            if entry[0] < key:
+                low = middle + 1
+            elif entry[0] > key:
+                high = middle
+            else:
+                return entry
+        return None
+
+    def probe(self, state):
+        """Return (turn, games from the position, games with the turn, wins with the turn) or None"""
+        if self._map is None:
+            self._open()
+
+        canonical, transform, key = _canonical(state)
+        entry = self._find(key)
+        if entry is None:
+            return None
+
+        _, code, total, games, wins = entry
+        return (from_canonical_turn(state, decode_turn(code), transform, canonical), total, games, wins)
+
+    def lookup(self, state):
+        """Return the book turn for state, or None if the position is not in the book"""
+        entry = self.probe(state)
+        return None if entry is None else entry[0]
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build an opening book from game record files")
+    parser.add_argument("records", nargs="+", help="game record files")
+    parser.add_argument("book", help="opening book file to write")
+    parser.add_argument("--plies", type=int, default=8)
+    parser.add_argument("--min-games", type=int, default=5)
+    args = parser.parse_args()
+
+    count = build_book(args.records, args.book, args.plies, args.min_games)
+    print(f"{count} positions written to {args.book}")
@@ -0,0 +1,135 @@
+"""Perft: count the legal full turns to a fixed depth as a speed and correctness check.
+
+    python perft.py --depth 3
+    python perft.py --depth 2 --engine board
+
+Every (worker, move, build) turn is one node. A turn that steps onto height
+3 ends the game, so no turns are generated after it. The counts are compared
+with REFERENCE and the run exits with status 1 on a mismatch.
+"""
+import argparse
+import sys
+import time
+from state import GameState
+
+# name -> (heights, worker squares A, B, Y, Z, side to move)
+POSITIONS = {
+    "start": (bytes(25), [16, 8, 6, 18], 0),
+    "towers": (bytes([0, 1, 2, 1, 0,
+                      1, 2, 3, 2, 1,
+                      2, 3, 4, 3, 2,
+                      1, 2, 3, 2, 1,
+                      0, 1, 2, 1, 0]), [6, 8, 16, 18], 0),
+    "crowded": (bytes([4, 4, 0, 1, 2,
+                       4, 2, 1, 0, 3,
+                       0, 1, 2, 3, 4,
+                       1, 0, 0, 2, 1,
+                       2, 3, 1, 0, 0]), [6, 12, 7, 18], 1),
+    "edges": (bytes([0, 0, 1, 0, 0,
+                     0, 3, 0, 2, 0,
+                     1, 0, 2, 0, 1,
+                     0, 2, 0, 3, 0,
+                     0, 0, 1, 0, 0]), [0, 24, 4, 20], 0),
+}
+
+# (position, depth) -> node count
+REFERENCE = {
+    ("start", 1): 80,
+    ("start", 2): 6176,
+    ("start", 3): 426384,
+    ("start", 4): 29096316,
+    ("towers", 1): 66,
+    ("towers", 2): 2758,
+    ("towers", 3): 84312,
+    ("towers", 4): 2789668,
+    ("crowded", 1): 48,
+    ("crowded", 2): 2045,
+    ("crowded", 3): 72344,
+    ("crowded", 4): 2815827,
+    ("edges", 1): 20,
+    ("edges", 2): 400,
+    ("edges", 3): 11412,
+    ("edges", 4): 317816,
+}
+
+def perft_state(state, depth):
+    """Count the turns to depth plies from a GameState"""
+    turns = state.legal_turns()
+    if depth == 1:
+        return len(turns)
+
+    heights = state.heights
+    workers = state.workers
+    nodes = 0
+    for turn in turns:
+        state.make(turn)
+        if heights[workers[turn[0]]] == 3:
+            nodes += 1
+        else:
+            nodes += perft_state(state, depth - 1)
+        state.unmake(turn)
+
+    return nodes
+
+def perft_board(board, depth):
+    """Count the turns to depth plies from a Board, using its move and build methods"""
+    names = ["A", "B"] if board.get_turn() == 0 else ["Y", "Z"]
+    nodes = 0
+    for worker in [board.get_worker(name) for name in names]:
+        for move in board.find_all_possible_moves(worker.get_worker_pos()):
+            board.move(move, worker)
+            builds = board.find_all_possible_builds(worker.get_worker_pos())
+            if depth == 1 or worker.check_height():
+                nodes += len(builds)
+                board.revert_turn(*board.get_last_turn()[:3])
+                continue
+            for index, build in enumerate(builds):
+                if index:
+                    board.move(move, worker)
+                board.build(build, worker)
+                last_turn = board.get_last_turn()
+                nodes += perft_board(board, depth - 1)
+                board.revert_turn(*last_turn)
+
+    return nodes
+
+def run_perft(depth, engine="state", positions=None):
+    """Run perft on the named positions and return (name, nodes, expected, seconds) rows"""
+    rows = []
+    for name in positions or POSITIONS:
+        heights, workers, turn = POSITIONS[name]
+        state = GameState(heights, workers, turn)
+
+        start = time.perf_counter()
+        if engine == "board":
+            nodes = perft_board(state.to_board(), depth)
+        else:
+            nodes = perft_state(state, depth)
+        rows.append((name, nodes, REFERENCE.get((name, depth)), time.perf_counter() - start))
+
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count legal turns to a fixed depth and check them against reference values")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--engine", choices=["state", "board"], default="state",
+                        help="generate turns with GameState or with Board move and build")
+    parser.add_argument("positions", nargs="*", help=f"positions to run (default: all of {', '.join(POSITIONS)})")
+    args = parser.parse_args()
+    for name in args.positions:
+        if name not in POSITIONS:
+            parser.error(f"unknown position {name}")
+
+    failed = False
+    for name, nodes, expected, seconds in run_perft(args.depth, args.engine, args.positions):
+        if expected is None:
+            status = "no reference"
+        elif nodes == expected:
+            status = "ok"
+        else:
+            status = f"MISMATCH (expected {expected})"
+            failed = True
+        speed = nodes / seconds if seconds else 0.0
+        print(f"{name:8} depth {args.depth}: {nodes} nodes in {seconds:.3f}s ({speed:.0f} nodes/s) {status}")
+
+    sys.exit(1 if failed else 0)
@@ -2,6 +2,17 @@
 from worker import Worker
 import random
 from board import Board, ValidDirectionError, ValidMoveError
+from neighbors import OFFSET_MAP, SIZE, TARGET_DIRECTION
+from state import GameState
+from search import Search, RootParallelSearch
+from transposition import TranspositionTable
+from mcts import MCTS, RootParallelMCTS
+from ponder import Ponderer
+from events import TerminalSink
+from evaluation import DEFAULT_WEIGHTS, Evaluator
+
+# (row offset, column offset) -> direction, the inverse of OFFSET_MAP
+OFFSET_DIRECTION = {tuple(offset): key for key, offset in OFFSET_MAP.items()}
 
 class ValidWorkerError(Exception):
     pass
@@ -10,13 +21,17 @@ class OtherWorkerError(Exception):
     pass
 
 class Player:
-    OFFSET_MAP = {'n':[-1, 0], 'ne':[-1, +1], 'e':[0, 1], 'se':[1, 1], 's':[1, 0], 'sw':[1, -1], 'w':[0, -1], 'nw':[-1, -1]}
+    OFFSET_MAP = OFFSET_MAP
+    OPENING_BOOK = None
+    WEIGHTS = DEFAULT_WEIGHTS
 
-    def __init__(self, workers, color, board: Board):
+    def __init__(self, workers, color, board: Board, events=None, weights=None):
         self._workers = workers
         self.color = color
+        self.weights = Player.WEIGHTS if weights is None else tuple(weights)
 
         self._board = board
+        self._events = TerminalSink() if events is None else events
 
         self._current_worker = None
         self._move_direction = None
@@ -36,7 +51,7 @@ class Player:
         """Check the height of a worker"""
         for worker in self._workers:
             if worker.check_height():
-                print(f"{self.color} has won")
+                self._events.game_over(self.color)
                 return True
         
         return False
@@ -47,6 +62,9 @@ class Player:
     def set_board(self, board):
         self._board = board
 
+    def set_events(self, events):
+        self._events = events
+
     def check_possible_moves(self):
         """Check if a player still has possible moves for their workers"""
         pos1 = self._workers[0].get_worker_pos()
@@ -54,9 +72,9 @@ class Player:
 
         if self._board.find_all_possible_moves(pos1) == [] and self._board.find_all_possible_moves(pos2) == []:
             if self.color == "blue":
-                print("white has won")
+                self._events.game_over("white")
             else:
-                print("blue has won")
+                self._events.game_over("blue")
             return True
         else:
             return False
@@ -71,13 +89,53 @@ class Player:
             current_pos2 = pos2
 
         other_pos = self._board.find_other_workers_pos(self._workers)
+        height_weight, center_weight, distance_weight, distance_base = self.weights
 
         self.height_score = self._board.find_height_score(current_pos1, current_pos2)
         self.center_score = self._board.find_center_score(current_pos1, current_pos2)
-        self.distance_score = self._board.find_distance_score([current_pos1, current_pos2], [other_pos[0], other_pos[1]]) 
+        self.distance_score = self._board.find_distance_score([current_pos1, current_pos2], [other_pos[0], other_pos[1]], distance_base) 
 
-        return (3*self.height_score + 2*self.center_score + 1*self.distance_score)
+        return (height_weight*self.height_score + center_weight*self.center_score + distance_weight*self.distance_score)
     
+    def find_all_turns(self):
+        """Lazily yield every legal (worker, move, build) turn for this player"""
+        return self._board.generate_turns(self._workers)
+
+    def get_state(self):
+        """Return the board as a GameState with this player to move"""
+        return GameState.from_board(self._board, 0 if self.color == "white" else 1)
+
+    def start_pondering(self):
+        """Think about the other player's turn while they decide; only AI players that ponder do"""
+        pass
+
+    def stop_pondering(self):
+        """Stop thinking about the other player's turn once it has been played"""
+        pass
+
+    def _book_turn(self, state):
+        """Return the opening book turn for state if a book is loaded and has a legal one"""
+        if Player.OPENING_BOOK is None:
+            return None
+
+        turn = Player.OPENING_BOOK.lookup(state)
+        if turn is not None and turn in state.legal_turns():
+            return turn
+        return None
+
+    def _play_state_turn(self, state, turn):
+        """Play a (worker, move square, build square) turn found for state on the board"""
+        worker, move, build = turn
+
+        self._current_worker = self._workers[worker % 2]
+        self._move_direction = TARGET_DIRECTION[state.workers[worker]][move]
+        self._build_direction = TARGET_DIRECTION[move][build]
+
+        self._board.move(self._move_direction, self._current_worker)
+        self._board.build(self._build_direction, self._current_worker)
+
+        self._events.turn_played(self, self._current_worker, self._move_direction, self._build_direction)
+
     def _pick_build(self):
         pos = self._current_worker.get_worker_pos()
         possible_builds_lst = self._board.find_all_possible_builds(pos)
@@ -85,7 +143,7 @@ class Player:
         self._build_direction = random.choice(possible_builds_lst)
         self._board.build(self._build_direction, self._current_worker)
 
-        print(f"{self._current_worker},{self._move_direction},{self._build_direction}")
+        self._events.turn_played(self, self._current_worker, self._move_direction, self._build_direction)
     
     def select_undo_redo(self):
         undo_redo = input("undo, redo, or next\n")
@@ -156,25 +214,29 @@ class RandomPlayer(Player):
         self._type = "random"
     
     def take_turn(self):
-        self._current_worker = self._pick_player()
-        self._pick_move()
+        self._current_worker, possible_moves_lst = self._pick_player()
+        self._pick_move(possible_moves_lst)
         self._pick_build()
 
     def _pick_player(self):
+        """Pick a worker that can move, returning it with its possible moves"""
         pos1 = self._workers[0].get_worker_pos()
-        if self._board.find_all_possible_moves(pos1) == []:
-            return self._workers[1]
-        
+        possible_moves1 = self._board.find_all_possible_moves(pos1)
+
         pos2 = self._workers[1].get_worker_pos()
-        if self._board.find_all_possible_moves(pos2) == []:
-            return self._workers[0]
+        possible_moves2 = self._board.find_all_possible_moves(pos2)
 
-        return random.choice(self._workers)
-    
-    def _pick_move(self):
-        pos = self._current_worker.get_worker_pos()
-        possible_moves_lst = self._board.find_all_possible_moves(pos)
+        if possible_moves1 == []:
+            return self._workers[1], possible_moves2
+        if possible_moves2 == []:
+            return self._workers[0], possible_moves1
 
+        worker = random.choice(self._workers)
+        if worker is self._workers[0]:
+            return worker, possible_moves1
+        return worker, possible_moves2
+    
+    def _pick_move(self, possible_moves_lst):
         self._move_direction = random.choice(possible_moves_lst)
         self._board.move(self._move_direction, self._current_worker)
 
@@ -185,28 +247,48 @@ class HeuristicPlayer(Player):
         self._type = "heuristic"
     
     def take_turn(self):
+        # the book only holds positions of the full size board
+        if Player.OPENING_BOOK is not None and self._board.get_size() == SIZE:
+            state = self.get_state()
+            turn = self._book_turn(state)
+            if turn is not None:
+                self._play_state_turn(state, turn)
+                return
+
+        winning_moves = self._board.find_winning_moves(self._workers)
+        if winning_moves:
+            self._current_worker, self._move_direction = winning_moves[0]
+            self._board.move(self._move_direction, self._current_worker)
+            self._pick_build()
+            return
+
+        threats = self._board.find_win_threats(self._board.find_other_workers(self._workers))
+        if threats and self._block_threat(threats):
+            return
+
+        score_move = self._move_scorer()
         pos1 = self._workers[0].get_worker_pos()
         pos2 = self._workers[1].get_worker_pos()
 
-        distance1 = -1
+        distance1 = float("-inf")
 
         possible_moves_lst = self._board.find_all_possible_moves(pos1)
         for item in possible_moves_lst:
             val = Player.OFFSET_MAP[item]
             pos = [(pos1[0] + val[0]), (pos1[1] + val[1])]
-            distance = self.calculate_move_score(pos, pos2)
-            if distance1 == -1 or distance1 < distance:
+            distance = score_move(0, pos)
+            if distance1 < distance:
                 distance1 = distance
                 direction1 = item
         
-        distance2 = -1
+        distance2 = float("-inf")
 
         possible_moves_lst = self._board.find_all_possible_moves(pos2)
         for item in possible_moves_lst:
             val = Player.OFFSET_MAP[item]
             pos = [(pos2[0] + val[0]), (pos2[1] + val[1])]
-            distance = self.calculate_move_score(pos1, pos)
-            if distance2 == -1 or distance2 < distance:
+            distance = score_move(1, pos)
+            if distance2 < distance:
                 distance2 = distance
                 direction2 = item
         
@@ -218,4 +300,141 @@ class HeuristicPlayer(Player):
             self._current_worker = self._workers[1]
         
         self._board.move(self._move_direction, self._current_worker)
-        self._pick_build()
\ No newline at end of file
+        self._pick_build()
+
+    def _move_scorer(self):
+        """Return a function giving the move score if worker 0 or 1 of this player moved to pos
+
+        On the full size board the scores are Evaluator deltas from one
+        GameState, so each candidate move costs a few table lookups; smaller
+        boards fall back to calculate_move_score.
+        """
+        if self._board.get_size() != SIZE:
+            def score_move(index, pos):
+                partner = self._workers[index ^ 1].get_worker_pos()
+                return self.calculate_move_score(pos, partner) if index == 0 else self.calculate_move_score(partner, pos)
+            return score_move
+
+        evaluator = Evaluator(self.get_state(), self.weights)
+        first = 0 if self.color == "white" else 2
+        return lambda index, pos: evaluator.move_score(first + index, pos[0] * SIZE + pos[1])
+
+    def _block_threat(self, threats):
+        """Move so that a worker can build a dome on a square the other player could win on
+
+        Among the moves that can, play the one with the best move score.
+        Return False if no move lets a worker build on any of the threats.
+        """
+        score_move = self._move_scorer()
+        best = None
+        for index, worker in enumerate(self._workers):
+            pos = worker.get_worker_pos()
+            for move in self._board.find_all_possible_moves(pos):
+                val = Player.OFFSET_MAP[move]
+                new_pos = [pos[0] + val[0], pos[1] + val[1]]
+                for threat in threats:
+                    build = OFFSET_DIRECTION.get((threat[0] - new_pos[0], threat[1] - new_pos[1]))
+                    if build is None:
+                        continue
+                    score = score_move(index, new_pos)
+                    if best is None or best[0] < score:
+                        best = (score, worker, move, build)
+
+        if best is None:
+            return False
+
+        _, self._current_worker, self._move_direction, self._build_direction = best
+        self._board.move(self._move_direction, self._current_worker)
+        self._board.build(self._build_direction, self._current_worker)
+        self._events.turn_played(self, self._current_worker, self._move_direction, self._build_direction)
+        return True
+
+
+class PonderingPlayer(Player):
+    """An AI player that can search the other player's replies in a background thread
+
+    The search works on GameState, so these players only play on the full
+    size board.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self._board.get_size() != SIZE:
+            raise ValueError(f"{type(self).__name__} only plays on a {SIZE}x{SIZE} board")
+        self._ponderer = None
+
+    def start_pondering(self):
+        if self._ponderer is not None:
+            self._ponderer.start(GameState.from_board(self._board, 1 if self.color == "white" else 0))
+
+    def stop_pondering(self):
+        if self._ponderer is not None:
+            self._ponderer.stop()
+
+    def _find_turn(self, state):
+        """Return the book turn, else the pondered answer, else a searched turn for state"""
+        turn = self._book_turn(state)
+        if turn is None and self._ponderer is not None:
+            turn = self._ponderer.lookup(state)
+        if turn is None:
+            turn = self._search.find_best_turn(state)
+        return turn
+
+    def take_turn(self):
+        state = self.get_state()
+        self._play_state_turn(state, self._find_turn(state))
+
+
+class SearchPlayer(PonderingPlayer):
+    TIME_LIMIT = 1.0
+    TABLE_MB = 16
+    PROCESSES = 1
+    PONDER = False
+
+    def __init__(self, *args, time_limit=None, table_mb=None, processes=None, ponder=None, **kwargs):   
+        super().__init__(*args, **kwargs)
+        self._type = "search"
+        time_limit = SearchPlayer.TIME_LIMIT if time_limit is None else time_limit
+        table_mb = SearchPlayer.TABLE_MB if table_mb is None else table_mb
+        processes = SearchPlayer.PROCESSES if processes is None else processes
+        ponder = SearchPlayer.PONDER if ponder is None else ponder
+
+        if processes > 1:
+            self._search = RootParallelSearch(processes, time_limit, table_mb=table_mb, weights=self.weights)
+            # the parallel search keeps its tables in the pool processes
+            table = TranspositionTable(table_mb) if ponder else None
+        else:
+            table = TranspositionTable(table_mb)
+            self._search = Search(time_limit, table=table, weights=self.weights)
+
+        if ponder:
+            self._ponderer = Ponderer(lambda interrupt: Search(time_limit, table=table, interrupt=interrupt,
+                                                             weights=self.weights))
+
+
+class MCTSPlayer(PonderingPlayer):
+    TIME_LIMIT = 1.0
+    ITERATIONS = None
+    PROCESSES = 1
+    PLAYOUT = "heuristic"
+    PONDER = False
+
+    def __init__(self, *args, time_limit=None, iterations=None, processes=None, playout=None, ponder=None, **kwargs):   
+        super().__init__(*args, **kwargs)
+        self._type = "mcts"
+        time_limit = MCTSPlayer.TIME_LIMIT if time_limit is None else time_limit
+        iterations = MCTSPlayer.ITERATIONS if iterations is None else iterations
+        processes = MCTSPlayer.PROCESSES if processes is None else processes
+        playout = MCTSPlayer.PLAYOUT if playout is None else playout
+        ponder = MCTSPlayer.PONDER if ponder is None else ponder
+
+        # seeded from the random module so a seeded game plays the same every time
+        if processes > 1:
+            self._search = RootParallelMCTS(processes, iterations, time_limit, playout,
+                                            seed=random.getrandbits(32), weights=self.weights)
+        else:
+            self._search = MCTS(iterations, time_limit, playout, seed=random.getrandbits(32), weights=self.weights)
+
+        if ponder:
+            self._ponderer = Ponderer(lambda interrupt: MCTS(iterations, time_limit, playout, seed=random.getrandbits(32),
+                                                           interrupt=interrupt, weights=self.weights))
@@ -0,0 +1,79 @@
+"""Pondering: search the other side's likely replies while it thinks.
+
+A Ponderer runs in a background thread while the other side (usually a
+human at the terminal) decides on a turn. It goes through the other side's
+legal turns, most promising first, and searches the position after each one
+with its own search object, keeping the best answer for every position it
+finished. When the other side's turn arrives the player stops the thread and
+looks up the new position: a hit is played at once, and a miss still finds
+the shared transposition table warm.
+"""
+import threading
+from evaluation import evaluate
+
+class Ponderer:
+    """Search the replies of a position in a background thread
+
+    make_search is called with a threading.Event and returns a search object
+    with find_best_turn(state) that gives up when the event is set, such as
+    Search or MCTS created with interrupt=event.
+    """
+
+    def __init__(self, make_search):
+        self._stop = threading.Event()
+        self._search = make_search(self._stop)
+        self._thread = None
+        self._answers = {}
+        self.pondered = 0
+
+    def start(self, state):
+        """Start pondering state, a position with the other side to move"""
+        self.stop()
+        self._stop.clear()
+        self._answers = {}
+        self.pondered = 0
+        self._thread = threading.Thread(target=self._ponder, args=(state.copy(),), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop pondering and wait for the thread, keeping the answers found so far"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def lookup(self, state):
+        """Return the pondered answer for state, or None if it was not finished"""
+        answer = self._answers.get(state.key)
+        if answer is not None and answer[0] == state:
+            return answer[1]
+        return None
+
+    def _order_replies(self, state):
+        """Order the replies of the side to move by how good they look for it"""
+        scored = []
+        for turn in state.legal_turns():
+            if state.heights[turn[1]] == 3:
+                # the game is over after a winning reply, there is nothing to answer
+                continue
+            state.make(turn)
+            scored.append((evaluate(state), turn))
+            state.unmake(turn)
+        scored.sort(key=lambda item: item[0])
+        return [turn for _, turn in scored]
+
+    def _ponder(self, state):
+        for reply in self._order_replies(state):
+            if self._stop.is_set():
+                return
+            state.make(reply)
+            position = state.copy()
+            state.unmake(reply)
+
+            turn = self._search.find_best_turn(position)
+            if self._stop.is_set():
+                # the search was cut short, so its turn is not a real answer
+                return
+            if turn is not None:
+                self._answers[position.key] = (position, turn)
+                self.pondered += 1
@@ -0,0 +1,113 @@
+"""Optional counters and timers around the game's hot paths.
+
+Nothing is instrumented until Profiler.enable is called: it replaces the
+listed methods with timing wrappers, and disable puts the originals back, so
+a game that is not profiled runs the plain methods at no extra cost.
+"""
+import functools
+import json
+import time
+from board import Board
+from memento import Caretaker
+from mcts import MCTS
+from player import Player, HumanPlayer, RandomPlayer, HeuristicPlayer, PonderingPlayer
+from search import Search
+
+# (class, method name); take_turn methods also feed the per-turn latency
+HOT_PATHS = [
+    (Board, "find_all_possible_moves"),
+    (Board, "find_all_possible_builds"),
+    (Board, "move"),
+    (Board, "build"),
+    (Board, "find_height_score"),
+    (Board, "find_center_score"),
+    (Board, "find_distance_score"),
+    (Board, "find_other_workers_pos"),
+    (Board, "find_winning_moves"),
+    (Board, "get_worker"),
+    (Board, "__str__"),
+    (Player, "calculate_move_score"),
+    (Player, "check_possible_moves"),
+    (Player, "check_worker_height"),
+    (Player, "get_state"),
+    (Player, "_pick_build"),
+    (HumanPlayer, "take_turn"),
+    (RandomPlayer, "take_turn"),
+    (HeuristicPlayer, "take_turn"),
+    # SearchPlayer and MCTSPlayer inherit take_turn from PonderingPlayer
+    (PonderingPlayer, "take_turn"),
+    (Search, "find_best_turn"),
+    (MCTS, "run"),
+    (Caretaker, "next"),
+    (Caretaker, "undo"),
+    (Caretaker, "redo"),
+]
+
+def percentile(sorted_values, fraction):
+    """Return the nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+class Profiler:
+    """Count calls and cumulative time of instrumented methods
+
+    Times are inclusive, so a method that calls another instrumented method
+    counts that time as well.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.turn_times = []
+        self._patched = []
+
+    def wrap(self, owner, name):
+        """Instrument owner.name until disable is called"""
+        original = owner.__dict__[name]
+        stats = self.calls.setdefault(f"{owner.__name__}.{name}", [0, 0.0])
+        turn_times = self.turn_times if name == "take_turn" else None
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                stats[0] += 1
+                stats[1] += elapsed
+                if turn_times is not None:
+                    turn_times.append(elapsed)
+
+        setattr(owner, name, wrapper)
+        self._patched.append((owner, name, original))
+
+    def enable(self, targets=HOT_PATHS):
+        for owner, name in targets:
+            self.wrap(owner, name)
+
+    def disable(self):
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        self._patched = []
+
+    def report(self):
+        """Return call counts, cumulative times and turn latency percentiles as a dict"""
+        calls = {}
+        for name, (count, total) in sorted(self.calls.items(), key=lambda item: -item[1][1]):
+            if count:
+                calls[name] = {"count": count, "total": total, "mean": total / count}
+
+        turn_times = sorted(self.turn_times)
+        latency = {"turns": len(turn_times),
+                   "p50": percentile(turn_times, 0.5),
+                   "p90": percentile(turn_times, 0.9),
+                   "p99": percentile(turn_times, 0.99),
+                   "max": turn_times[-1] if turn_times else 0.0}
+
+        return {"calls": calls, "turn_latency": latency}
+
+    def write_report(self, path):
+        with open(path, "w") as report:
+            json.dump(self.report(), report, indent=2)
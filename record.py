@@ -0,0 +1,173 @@
+"""Compact binary game records.
+
+A record file starts with MAGIC and a version byte, followed by games laid
+out back to back. A game is a fixed 33-byte header
+
+    heights (25 bytes), worker squares A, B, Y, Z (4 bytes), side to move,
+    winner (0 white, 1 blue, 255 unknown), number of turns (uint16)
+
+followed by one byte per turn: worker index (2 bits), move direction (3 bits)
+and build direction (3 bits), the directions counted in OFFSET_MAP order.
+Files are read through mmap, so iterating over games or positions does not
+load the whole file.
+"""
+import mmap
+import os
+import struct
+from neighbors import OFFSET_MAP, DIRECTION_TARGET, TARGET_DIRECTION
+from state import GameState
+
+MAGIC = b"SNTR"
+VERSION = 1
+FILE_HEADER = MAGIC + bytes([VERSION])
+
+GAME_HEADER = struct.Struct("<25s4sBBH")
+NO_WINNER = 255
+
+DIRECTIONS = list(OFFSET_MAP)
+DIRECTION_INDEX = {key: index for index, key in enumerate(DIRECTIONS)}
+
+class RecordFormatError(Exception):
+    pass
+
+def encode_turn(state, turn):
+    """Encode a (worker, move square, build square) turn played from state in one byte"""
+    worker, move, build = turn
+    move_direction = DIRECTION_INDEX[TARGET_DIRECTION[state.workers[worker]][move]]
+    build_direction = DIRECTION_INDEX[TARGET_DIRECTION[move][build]]
+    return (worker << 6) | (move_direction << 3) | build_direction
+
+def decode_turn(state, code):
+    """Decode a turn byte into a (worker, move square, build square) turn for state"""
+    worker = code >> 6
+    move = DIRECTION_TARGET[state.workers[worker]][DIRECTIONS[(code >> 3) & 7]]
+    build = DIRECTION_TARGET[move][DIRECTIONS[code & 7]]
+    return (worker, move, build)
+
+def encode_game(initial, turns, winner=None):
+    """Return the bytes of one game played from the initial GameState"""
+    state = initial.copy()
+    codes = bytearray()
+    for turn in turns:
+        codes.append(encode_turn(state, turn))
+        state.make(turn)
+
+    header = GAME_HEADER.pack(bytes(initial.heights), bytes(initial.workers), initial.turn,
+                              NO_WINNER if winner is None else winner, len(codes))
+    return header + bytes(codes)
+
+class GameRecord:
+    """A game read from a record file: the initial position and its turn bytes"""
+
+    def __init__(self, initial, codes, winner):
+        self.initial = initial
+        self.codes = codes
+        self.winner = winner
+
+    def __len__(self):
+        return len(self.codes)
+
+    def turns(self):
+        """Yield the (worker, move square, build square) turns of the game"""
+        state = self.initial.copy()
+        for code in self.codes:
+            turn = decode_turn(state, code)
+            yield turn
+            state.make(turn)
+
+    def positions(self):
+        """Yield (state, turn) for every turn, with the state before the turn
+
+        The same GameState object is updated in place between steps; copy it
+        to keep a position.
+        """
+        state = self.initial.copy()
+        for code in self.codes:
+            turn = decode_turn(state, code)
+            yield state, turn
+            state.make(turn)
+
+class GameRecordWriter:
+    """Append games to a record file, buffering them to write in bulk"""
+
+    def __init__(self, path, buffer_games=1024):
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(FILE_HEADER)
+        self._buffer = []
+        self._buffer_games = buffer_games
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write_game(self, initial, turns, winner=None):
+        self.write_encoded(encode_game(initial, turns, winner))
+
+    def write_encoded(self, data):
+        """Append a game already encoded with encode_game"""
+        self._buffer.append(data)
+        if len(self._buffer) >= self._buffer_games:
+            self.flush()
+
+    def flush(self):
+        self._file.write(b"".join(self._buffer))
+        self._buffer = []
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+class GameRecordReader:
+    """Iterate lazily over the games of a memory-mapped record file"""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._map = b""
+        else:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(FILE_HEADER)] != FILE_HEADER:
+            self.close()
+            raise RecordFormatError(f"{path} is not a version {VERSION} game record file")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        return self.games()
+
+    def games(self):
+        """Yield every GameRecord in file order"""
+        data = self._map
+        offset = len(FILE_HEADER)
+        end = len(data)
+        while offset < end:
+            if offset + GAME_HEADER.size > end:
+                raise RecordFormatError("truncated game header")
+            heights, workers, turn, winner, count = GAME_HEADER.unpack_from(data, offset)
+            offset += GAME_HEADER.size
+            if offset + count > end:
+                raise RecordFormatError("truncated game turns")
+
+            initial = GameState(heights, workers, turn)
+            yield GameRecord(initial, data[offset:offset + count], None if winner == NO_WINNER else winner)
+            offset += count
+
+    def positions(self):
+        """Yield (game record, state, turn) for every turn of every game"""
+        for game in self.games():
+            for state, turn in game.positions():
+                yield game, state, turn
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
@@ -0,0 +1,296 @@
+"""Negamax alpha-beta search over GameState with iterative deepening."""
+import time
+from multiprocessing import Pool, Value
+from evaluation import Evaluator, DEFAULT_WEIGHTS
+from state import GameState
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+WIN_SCORE = 100000
+MAX_DEPTH = 64
+# scores beyond this are wins or losses a number of plies away
+WIN_BOUND = WIN_SCORE - 1000
+
+class SearchTimeout(Exception):
+    pass
+
+class Search:
+    """Iterative deepening negamax search with a wall-clock budget
+
+    Turns are (worker, move square, build square) triples as produced by
+    GameState.legal_turns. Moving onto height 3 wins immediately, so those
+    turns are tried first and end the search of their node; when the other
+    side threatens such a move only the blocking turns are searched. An optional
+    TranspositionTable is probed by position key before searching a node. An
+    optional threading.Event interrupt ends the search like the time budget
+    when it is set from another thread. weights are the evaluation weights
+    used at the leaves, whose scores are rounded to integers.
+    """
+
+    # nodes between clock checks; a node takes tens of microseconds, so this
+    # keeps the overrun of the time budget to about a millisecond
+    CHECK_EVERY = 64
+
+    def __init__(self, time_limit=1.0, max_depth=MAX_DEPTH, table=None, interrupt=None, weights=DEFAULT_WEIGHTS):
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.table = table
+        self.interrupt = interrupt
+        self.weights = weights
+
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+        self._deadline = None
+        self._evaluator = None
+
+    def _order_turns(self, state, turns, first=None):
+        """Try winning and climbing moves first, then the best turn of the last iteration"""
+        heights = state.heights
+        turns.sort(key=lambda turn: heights[turn[1]], reverse=True)
+        if first is not None and first in turns:
+            turns.remove(first)
+            turns.insert(0, first)
+        return turns
+
+    def _check_time(self):
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise SearchTimeout
+        if self.interrupt is not None and self.interrupt.is_set():
+            raise SearchTimeout
+
+    def negamax(self, state, depth, alpha, beta, ply):
+        """Return the score of state for the side to move"""
+        self.nodes += 1
+        if self.nodes % Search.CHECK_EVERY == 0:
+            self._check_time()
+
+        turns = state.legal_turns()
+        if not turns:
+            return -WIN_SCORE + ply
+
+        heights = state.heights
+        for turn in turns:
+            if heights[turn[1]] == 3:
+                return WIN_SCORE - ply - 1
+
+        # when the other side threatens to win, only turns that take the threat away can avoid a loss
+        if state.win_threats(state.turn ^ 1):
+            turns = state.blocking_turns(turns)
+            if not turns:
+                return -WIN_SCORE + ply + 2
+
+        if depth == 0:
+            return round(self._evaluator.evaluate())
+
+        table = self.table
+        first = None
+        if table is not None:
+            entry = table.probe(state.key)
+            if entry is not None:
+                entry_depth, bound, score, first = entry
+                if entry_depth >= depth:
+                    score = _score_from_table(score, ply)
+                    if (bound == EXACT or (bound == LOWER and score >= beta)
+                            or (bound == UPPER and score <= alpha)):
+                        return score
+
+        evaluator = self._evaluator
+        alpha_start = alpha
+        best = -WIN_SCORE
+        best_turn = None
+        for turn in self._order_turns(state, turns, first):
+            evaluator.make(turn)
+            score = -self.negamax(state, depth - 1, -beta, -alpha, ply + 1)
+            evaluator.unmake(turn)
+
+            if score > best:
+                best = score
+                best_turn = turn
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                break
+
+        if table is not None:
+            if best <= alpha_start:
+                bound = UPPER
+            elif best >= beta:
+                bound = LOWER
+            else:
+                bound = EXACT
+            table.store(state.key, depth, bound, _score_to_table(best, ply), best_turn)
+
+        return best
+
+    def _search_root(self, state, depth, turns, shared_alpha=None):
+        """Return (best turn, score) of the root turns
+
+        With a shared_alpha Value the bound is read from and raised for other
+        processes searching the rest of the root turns. A turn only becomes
+        best with an exact score, so best turn is None if every turn failed
+        low against the shared bound.
+        """
+        best_turn = None
+        alpha = -WIN_SCORE - 1
+        evaluator = self._evaluator = Evaluator(state, self.weights)
+        for turn in turns:
+            if shared_alpha is not None and shared_alpha.value > alpha:
+                alpha = shared_alpha.value
+            evaluator.make(turn)
+            score = -self.negamax(state, depth - 1, -WIN_SCORE - 1, -alpha, 1)
+            evaluator.unmake(turn)
+            if score > alpha:
+                alpha = score
+                best_turn = turn
+                if shared_alpha is not None:
+                    with shared_alpha.get_lock():
+                        if score > shared_alpha.value:
+                            shared_alpha.value = score
+
+        return best_turn, alpha
+
+    def find_best_turn(self, state):
+        """Return the best turn found within the time budget, or None if there is no legal turn"""
+        self.nodes = 0
+        self.depth = 0
+        self._deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        if self.table is not None:
+            self.table.new_search()
+
+        turns = self._order_turns(state, state.legal_turns())
+        if not turns:
+            return None
+
+        best_turn = turns[0]
+        self.score = 0
+        if state.heights[best_turn[1]] == 3:
+            self.score = WIN_SCORE - 1
+            return best_turn
+
+        for depth in range(1, self.max_depth + 1):
+            try:
+                turn, score = self._search_root(state.copy(), depth, list(turns))
+            except SearchTimeout:
+                break
+
+            best_turn, self.score, self.depth = turn, score, depth
+            if self.table is not None:
+                self.table.store(state.key, depth, EXACT, _score_to_table(score, 0), best_turn)
+            turns = self._order_turns(state, turns, best_turn)
+            if abs(score) >= WIN_SCORE - MAX_DEPTH:
+                break
+
+        return best_turn
+
+# per-process search, table and shared root bound of a RootParallelSearch pool
+_worker_search = None
+_shared_alpha = None
+
+def _init_worker(shared_alpha, table_mb, weights):
+    global _worker_search, _shared_alpha
+    _worker_search = Search(None, table=None if table_mb is None else TranspositionTable(table_mb), weights=weights)
+    _shared_alpha = shared_alpha
+
+def _search_chunk(task):
+    """Search some root turns to depth; return (turn, score, nodes), or None on timeout"""
+    heights, workers, side, depth, turns, time_left = task
+    search = _worker_search
+    search.nodes = 0
+    if depth == 1 and search.table is not None:
+        search.table.new_search()
+    search._deadline = time.perf_counter() + time_left
+    try:
+        turn, score = search._search_root(GameState(heights, workers, side), depth, turns, _shared_alpha)
+    except SearchTimeout:
+        return None
+    return turn, score, search.nodes
+
+class RootParallelSearch:
+    """Split the root turns of each iteration across a process pool
+
+    Every depth of the iterative deepening is searched by handing each
+    process a share of the root turns. The processes raise a shared alpha as
+    they find better turns, so the others search with a narrower window. A
+    depth only counts if every process finishes it within the time budget.
+    Each process keeps its own transposition table between searches. The pool
+    is started on first use and kept for later searches; call close when done
+    with it.
+    """
+
+    def __init__(self, processes, time_limit=1.0, max_depth=MAX_DEPTH, table_mb=16, weights=DEFAULT_WEIGHTS):
+        self.processes = processes
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.table_mb = table_mb
+        self.weights = weights
+
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+        self._pool = None
+        self._alpha = None
+
+    def find_best_turn(self, state):
+        """Return the best turn found within the time budget, or None if there is no legal turn"""
+        start = time.perf_counter()
+        if self._pool is None:
+            self._alpha = Value("i", 0)
+            self._pool = Pool(self.processes, _init_worker, (self._alpha, self.table_mb, self.weights))
+
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+        ordering = Search(None)
+        turns = ordering._order_turns(state, state.legal_turns())
+        if not turns:
+            return None
+
+        best_turn = turns[0]
+        if state.heights[best_turn[1]] == 3:
+            self.score = WIN_SCORE - 1
+            return best_turn
+
+        heights = bytes(state.heights)
+        workers = list(state.workers)
+        for depth in range(1, self.max_depth + 1):
+            time_left = float("inf") if self.time_limit is None else start + self.time_limit - time.perf_counter()
+            if time_left <= 0:
+                break
+
+            self._alpha.value = -WIN_SCORE - 1
+            # deal the turns out in order so the best turn so far is searched first
+            tasks = [(heights, workers, state.turn, depth, turns[index::self.processes], time_left)
+                     for index in range(min(self.processes, len(turns)))]
+            results = self._pool.map(_search_chunk, tasks, chunksize=1)
+            if None in results:
+                break
+
+            self.nodes += sum(nodes for _, _, nodes in results)
+            turn, score, _ = max((result for result in results if result[0] is not None), key=lambda result: result[1])
+            best_turn, self.score, self.depth = turn, score, depth
+            turns = ordering._order_turns(state, turns, best_turn)
+            if abs(score) >= WIN_SCORE - MAX_DEPTH:
+                break
+
+        return best_turn
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+def _score_to_table(score, ply):
+    """Store win and loss scores relative to the node instead of the root"""
+    if score >= WIN_BOUND:
+        return score + ply
+    if score <= -WIN_BOUND:
+        return score - ply
+    return score
+
+def _score_from_table(score, ply):
+    if score >= WIN_BOUND:
+        return score - ply
+    if score <= -WIN_BOUND:
+        return score + ply
+    return score
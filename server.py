@@ -0,0 +1,332 @@
+"""asyncio server hosting many games over a line-based TCP protocol.
+
+    python server.py --port 4000
+
+Every request is one line and gets one reply line starting with OK or ERR.
+Game events are pushed to every connection in the game as they happen.
+
+    NEW <white> <blue> [undo]      -> OK <game>   player types: human, random, heuristic, search, mcts
+    JOIN <game> <white|blue>       -> OK          take over a human seat
+    WATCH <game>                   -> OK          receive the game's events
+    MOVE <game> <worker> <move> <build>           play a turn for a human seat you hold
+    UNDO <game> / REDO <game>                     when the game was created with undo
+    BOARD <game>                   -> OK <board>
+    QUIT
+
+    pushed: TURN <game> <worker>,<move>,<build>
+            BOARD <game> <turn number> <color> <board>
+            OVER <game> <winner>
+            ABORT <game>                       a human seat's connection closed, the game is dropped
+            ERR <game> invalid turn <reason>   for a MOVE that was queued but is not legal
+
+A board is written row by row, each square as its height followed by its
+worker or '.', rows separated by '/'. Human seats start out held by the
+connection that created the game. AI players think in a thread pool so a
+long search does not hold up the other games.
+"""
+import argparse
+import asyncio
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from board import Board, ValidDirectionError, ValidMoveError
+from worker import Worker
+from player import HumanPlayer, ValidWorkerError, OtherWorkerError
+from factory import WhitePlayerFactory, BluePlayerFactory, create_player
+from memento import Memento, ConcreteMemento, Caretaker
+from events import EventSink
+from neighbors import SIZE
+
+AI_TYPES = ["random", "heuristic", "search", "mcts"]
+
+class ProtocolError(Exception):
+    pass
+
+def format_board(board):
+    rows = []
+    for row in board._board_layout:
+        rows.append("".join(f"{space.get_height()}{space.get_worker() or '.'}" for space in row))
+    return "/".join(rows)
+
+class RemotePlayer(HumanPlayer):
+    """A human player whose turns arrive over the network instead of from input()"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._type = "remote"
+
+    def play(self, worker_name, move_direction, build_direction):
+        """Play a turn, raising the same errors HumanPlayer reports for bad input
+
+        Nothing changes on the board if any part of the turn is invalid.
+        """
+        worker = self._check_input_worker(worker_name)
+        start = worker.get_worker_row() * SIZE + worker.get_worker_col()
+        self._board.move(move_direction, worker)
+        try:
+            self._board.build(build_direction, worker)
+        except (ValidDirectionError, ValidMoveError):
+            self._board.revert_turn(worker, start, self._board.get_last_turn()[2])
+            raise
+
+        self._current_worker = worker
+        self._move_direction = move_direction
+        self._build_direction = build_direction
+        self._events.turn_played(self, worker, move_direction, build_direction)
+
+class GameSink(EventSink):
+    """Push a game's events to every connection in the game"""
+
+    def __init__(self, game):
+        self._game = game
+
+    def turn_played(self, player, worker, move, build):
+        self._game.broadcast(f"TURN {self._game.id} {worker},{move},{build}")
+
+    def board_changed(self, board, turn, player, scores=None):
+        self._game.broadcast(f"BOARD {self._game.id} {turn} {player.color} {format_board(board)}")
+
+    def game_over(self, winner):
+        self._game.broadcast(f"OVER {self._game.id} {winner}")
+
+class ServerGame:
+    """One game: its board, players, seats and undo/redo history"""
+
+    def __init__(self, game_id, white_type, blue_type, undo_redo, connection, executor):
+        self.id = game_id
+        self._loop = asyncio.get_running_loop()
+        self._executor = executor
+        self._undo_redo = undo_redo
+        self._connections = {connection}
+        self.seats = {}
+
+        worker_A = Worker('A', 3, 1)
+        worker_B = Worker('B', 1, 3)
+        worker_Y = Worker('Y', 1, 1)
+        worker_Z = Worker('Z', 3, 3)
+        self._board = Board(worker_A, worker_B, worker_Y, worker_Z)
+
+        self._events = events = GameSink(self)
+        players = []
+        for color, factory, player_type, workers in (("white", WhitePlayerFactory, white_type, [worker_A, worker_B]),
+                                                    ("blue", BluePlayerFactory, blue_type, [worker_Y, worker_Z])):
+            if player_type == "human":
+                player = RemotePlayer(workers, color, self._board, events)
+                self.seats[color] = connection
+            else:
+                player = create_player(factory, player_type, workers[0], workers[1], self._board)
+                player.set_events(events)
+            players.append(player)
+
+        self._current_player, self._other_player = players
+        self._turn = 1
+        self._caretaker = Caretaker(self)
+        self._actions = asyncio.Queue()
+        self.finished = False
+
+    def broadcast(self, line):
+        # AI players report their turns from an executor thread, and stream
+        # writers may only be used on the event loop
+        self._loop.call_soon_threadsafe(self._send_all, line)
+
+    def _send_all(self, line):
+        for connection in list(self._connections):
+            connection.send(line)
+
+    def watch(self, connection):
+        self._connections.add(connection)
+
+    def leave(self, connection):
+        """Forget a closed connection; a game that waits on a seat it held cannot go on"""
+        self._connections.discard(connection)
+        if connection in self.seats.values() and not self.finished:
+            self._actions.put_nowait(("abort",))
+
+    def save(self) -> Memento:
+        return ConcreteMemento(self._board.get_last_turn())
+
+    def restore(self, memento: Memento):
+        self._board.revert_turn(*memento.get_state())
+
+    def replay(self, memento: Memento):
+        self._board.replay_turn(*memento.get_state())
+
+    def board_text(self):
+        return format_board(self._board)
+
+    def submit(self, connection, action):
+        """Queue a MOVE, UNDO or REDO for the human player to move"""
+        if self.finished:
+            raise ProtocolError("game is over")
+        if not isinstance(self._current_player, RemotePlayer):
+            raise ProtocolError("not waiting for a human player")
+        if self.seats.get(self._current_player.color) is not connection:
+            raise ProtocolError("not your turn")
+        if action[0] in ("undo", "redo") and not self._undo_redo:
+            raise ProtocolError("undo is off for this game")
+        self._actions.put_nowait(action)
+
+    def _switch(self, num):
+        self._turn += num
+        self._current_player, self._other_player = self._other_player, self._current_player
+
+    def _step_back(self, step):
+        """Undo or redo turns until a human is to move again or the history runs out"""
+        moved = False
+        while step():
+            self._switch(-1 if step == self._caretaker.undo else 1)
+            moved = True
+            if isinstance(self._current_player, RemotePlayer):
+                break
+        return moved
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._events.board_changed(self._board, self._turn, self._current_player)
+            if self._other_player.check_worker_height() or self._current_player.check_possible_moves():
+                break
+
+            player = self._current_player
+            if isinstance(player, RemotePlayer):
+                action = await self._actions.get()
+                if action[0] == "abort":
+                    self.broadcast(f"ABORT {self.id}")
+                    break
+                if action[0] == "undo":
+                    self._step_back(self._caretaker.undo)
+                    continue
+                if action[0] == "redo":
+                    self._step_back(self._caretaker.redo)
+                    continue
+
+                _, connection, worker, move, build = action
+                try:
+                    player.play(worker, move, build)
+                except (ValidWorkerError, OtherWorkerError, ValidDirectionError, ValidMoveError) as error:
+                    connection.send(f"ERR {self.id} invalid turn {type(error).__name__}")
+                    continue
+            else:
+                await loop.run_in_executor(self._executor, player.take_turn)
+
+            if self._undo_redo:
+                self._caretaker.next()
+            self._switch(1)
+
+        self.finished = True
+
+class Connection:
+    """A client connection and the line commands it sends"""
+
+    def __init__(self, server, reader, writer):
+        self._server = server
+        self._reader = reader
+        self._writer = writer
+        self._games = set()
+
+    def send(self, line):
+        if not self._writer.is_closing():
+            self._writer.write(line.encode() + b"\n")
+
+    async def serve(self):
+        try:
+            while True:
+                data = await self._reader.readline()
+                if not data:
+                    break
+                words = data.decode(errors="replace").split()
+                if not words:
+                    continue
+                if words[0].upper() == "QUIT":
+                    self.send("OK bye")
+                    break
+                try:
+                    self.send(self._handle(words[0].upper(), words[1:]))
+                except ProtocolError as error:
+                    self.send(f"ERR {error}")
+                await self._writer.drain()
+        finally:
+            for game in self._games:
+                game.leave(self)
+            self._writer.close()
+
+    def _game(self, args, count):
+        if len(args) != count:
+            raise ProtocolError("wrong number of arguments")
+        game = self._server.games.get(args[0])
+        if game is None:
+            raise ProtocolError(f"no game {args[0]}")
+        return game
+
+    def _handle(self, command, args):
+        if command == "NEW":
+            if len(args) not in (2, 3) or any(kind not in AI_TYPES + ["human"] for kind in args[:2]):
+                raise ProtocolError("usage: NEW <white> <blue> [undo]")
+            game = self._server.new_game(args[0], args[1], args[2:] == ["undo"], self)
+            self._games.add(game)
+            return f"OK {game.id}"
+        if command == "JOIN":
+            game = self._game(args, 2)
+            if args[1] not in game.seats:
+                raise ProtocolError(f"no human seat {args[1]}")
+            game.seats[args[1]] = self
+            game.watch(self)
+            self._games.add(game)
+            return "OK"
+        if command == "WATCH":
+            game = self._game(args, 1)
+            game.watch(self)
+            self._games.add(game)
+            return "OK"
+        if command == "BOARD":
+            return f"OK {self._game(args, 1).board_text()}"
+        if command == "MOVE":
+            game = self._game(args[:1], 1)
+            if len(args) != 4:
+                raise ProtocolError("usage: MOVE <game> <worker> <move> <build>")
+            game.submit(self, ("move", self, args[1], args[2], args[3]))
+            return "OK"
+        if command in ("UNDO", "REDO"):
+            game = self._game(args, 1)
+            game.submit(self, (command.lower(),))
+            return "OK"
+        raise ProtocolError(f"unknown command {command}")
+
+class GameServer:
+    """Accept connections and run every game as its own task"""
+
+    def __init__(self, threads=None):
+        self.games = {}
+        self._ids = itertools.count(1)
+        self._executor = ThreadPoolExecutor(threads)
+        self._tasks = set()
+
+    def new_game(self, white_type, blue_type, undo_redo, connection):
+        game = ServerGame(str(next(self._ids)), white_type, blue_type, undo_redo, connection, self._executor)
+        self.games[game.id] = game
+        task = asyncio.get_running_loop().create_task(self._play(game))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return game
+
+    async def _play(self, game):
+        try:
+            await game.run()
+        finally:
+            self.games.pop(game.id, None)
+
+    async def _accept(self, reader, writer):
+        await Connection(self, reader, writer).serve()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self._accept, host, port)
+        async with server:
+            await server.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Host Santorini games over TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--threads", type=int, default=None, help="threads for AI players")
+    args = parser.parse_args()
+
+    asyncio.run(GameServer(args.threads).serve(args.host, args.port))
@@ -0,0 +1,398 @@
+"""Exact retrograde solver for small boards.
+
+    python solver.py --size 3 --processes 8 --output solved3.bin
+    python solver.py --position "121/432/201 00,02,20,22 w" --check heuristic
+    python solver.py --table solved3.bin --check heuristic --sample 1000
+
+Every turn builds one level, so a position with n builds can only lead to
+positions with n + 1 builds and the game graph has no cycles. The solver
+enumerates the positions reachable from the start layer by layer, then
+labels them from the last layer back to the first: a position is a win if
+some turn leads to a loss for the other side, in the fewest plies, and a loss
+if every turn leads to a win for the other side, in the most plies. With no
+cycles there are no draws; DRAW is only reported for positions missing from
+the table.
+
+Positions are stored as integers: the heights as base-5 digits, then the
+squares of workers A, B, Y and Z and the side to move. Symmetric positions and
+positions that only swap the two workers of a side share one key, the
+smallest of their images. The solved table keeps, for every number of levels
+built, a sorted array of keys with one result and one distance byte per key.
+
+The whole 3x3 game has tens of millions of positions, which takes hours per
+core; solving from a midgame position given in Board notation takes seconds.
+Keys fit 64 bits up to 4x4, but the 4x4 game is far too large to enumerate.
+"""
+import argparse
+import json
+import random
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from multiprocessing import Pool
+from operator import itemgetter
+from neighbors import board_tables, start_positions
+from symmetry import square_transforms
+from board import Board
+from worker import Worker
+from factory import WhitePlayerFactory, BluePlayerFactory, create_player
+from events import NullSink
+from zobrist import WORKER_NAMES
+
+# results from the point of view of the side to move
+DRAW = 0
+WIN = 1
+LOSS = 2
+RESULT_NAMES = {DRAW: "draw", WIN: "win", LOSS: "loss"}
+
+MAX_SIZE = 4
+MAGIC = b"SNTS"
+VERSION = 1
+TABLE_HEADER = struct.Struct("<4sBBQ")
+
+class Positions:
+    """Move generation, canonical keys and encoding for one board size"""
+
+    def __init__(self, size):
+        if size > MAX_SIZE:
+            raise ValueError(f"the solver handles boards up to {MAX_SIZE}x{MAX_SIZE}: {size}")
+        tables = board_tables(size)
+        self.size = size
+        self.squares = tables.squares
+        self._neighbor_squares = tables.neighbor_squares
+
+        transforms = square_transforms(size)
+        self._transforms = transforms
+        # _height_getters[t](heights) -> heights laid out after transform t
+        inverses = []
+        for squares in transforms:
+            inverse = [0] * self.squares
+            for sq, target in enumerate(squares):
+                inverse[target] = sq
+            inverses.append(itemgetter(*inverse))
+        self._height_getters = tuple(inverses)
+
+    def start(self):
+        """Return (heights, workers, turn) of the start position"""
+        workers = [row * self.size + col for row, col in start_positions(self.size)]
+        return [0] * self.squares, workers, 0
+
+    def encode(self, heights, workers, turn):
+        key = int("".join(map(str, heights)), 5)
+        squares = self.squares
+        for sq in workers:
+            key = key * squares + sq
+        return key * 2 + turn
+
+    def decode(self, key):
+        turn = key & 1
+        key >>= 1
+        squares = self.squares
+        workers = [0] * 4
+        for index in range(3, -1, -1):
+            key, workers[index] = divmod(key, squares)
+        heights = [0] * squares
+        for sq in range(squares - 1, -1, -1):
+            key, heights[sq] = divmod(key, 5)
+        return heights, workers, turn
+
+    def canonical_key(self, heights, workers, turn):
+        """Return the key shared by every symmetric image of the position"""
+        a, b, y, z = workers
+        best = None
+        for squares, getter in zip(self._transforms, self._height_getters):
+            a1, b1, y1, z1 = squares[a], squares[b], squares[y], squares[z]
+            if a1 > b1:
+                a1, b1 = b1, a1
+            if y1 > z1:
+                y1, z1 = z1, y1
+            candidate = (getter(heights), a1, b1, y1, z1)
+            if best is None or candidate < best:
+                best = candidate
+        return self.encode(best[0], best[1:], turn)
+
+    def is_over(self, heights, workers, turn):
+        """Check if the other side has won by standing on height 3"""
+        other = (2, 3) if turn == 0 else (0, 1)
+        return heights[workers[other[0]]] == 3 or heights[workers[other[1]]] == 3
+
+    def can_win(self, heights, workers, turn):
+        """Check if the side to move can step from height 2 onto a free height 3"""
+        for worker in ((0, 1) if turn == 0 else (2, 3)):
+            if heights[workers[worker]] == 2:
+                for sq in self._neighbor_squares[workers[worker]]:
+                    if heights[sq] == 3 and sq not in workers:
+                        return True
+        return False
+
+    def children(self, heights, workers, turn):
+        """Yield (heights, workers, turn) after every legal turn of the side to move"""
+        neighbor_squares = self._neighbor_squares
+        for worker in ((0, 1) if turn == 0 else (2, 3)):
+            start = workers[worker]
+            limit = heights[start] + 1
+            for to in neighbor_squares[start]:
+                if heights[to] > limit or heights[to] == 4 or to in workers:
+                    continue
+                moved = list(workers)
+                moved[worker] = to
+                for build in neighbor_squares[to]:
+                    if heights[build] < 4 and build not in moved:
+                        built = list(heights)
+                        built[build] += 1
+                        yield built, moved, turn ^ 1
+
+class SolvedTable:
+    """Solved positions grouped by the number of levels built
+
+    layers[n] is (sorted keys, results, distances) of the positions with n
+    levels on the board, so a probe only searches the positions that can
+    match.
+    """
+
+    def __init__(self, size, layers):
+        self.positions = Positions(size)
+        self.size = size
+        self.layers = layers
+
+    def __len__(self):
+        return sum(len(keys) for keys, _, _ in self.layers)
+
+    def count(self, result):
+        return sum(results.count(result) for _, results, _ in self.layers)
+
+    def probe(self, heights, workers, turn):
+        """Return (result, distance) of a position, or (DRAW, 0) if it is not in the table"""
+        keys, results, distances = self.layers[sum(heights)]
+        key = self.positions.canonical_key(heights, workers, turn)
+        index = bisect_left(keys, key)
+        if index < len(keys) and keys[index] == key:
+            return results[index], distances[index]
+        return DRAW, 0
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(TABLE_HEADER.pack(MAGIC, VERSION, self.size, len(self.layers)))
+            for keys, results, distances in self.layers:
+                f.write(struct.pack("<Q", len(keys)))
+                keys.tofile(f)
+                f.write(results)
+                f.write(distances)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            magic, version, size, count = TABLE_HEADER.unpack(f.read(TABLE_HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a solved table")
+            layers = []
+            for _ in range(count):
+                length, = struct.unpack("<Q", f.read(8))
+                keys = array("Q")
+                keys.fromfile(f, length)
+                layers.append((keys, bytearray(f.read(length)), bytearray(f.read(length))))
+        return cls(size, layers)
+
+# per-process positions and labels of the next layer in a solve pool
+_positions = None
+_next_keys = None
+_next_values = None
+
+def _init_worker(size, next_keys=None, next_values=None):
+    global _positions, _next_keys, _next_values
+    _positions = Positions(size)
+    _next_keys = next_keys
+    _next_values = next_values
+
+def _expand(keys):
+    """Return the keys of every position one turn after the given ones"""
+    positions = _positions
+    following = set()
+    for key in keys:
+        heights, workers, turn = positions.decode(key)
+        if positions.is_over(heights, workers, turn):
+            continue
+        for child in positions.children(heights, workers, turn):
+            following.add(positions.canonical_key(*child))
+    return array("Q", following)
+
+def _label(keys):
+    """Return (results, distances) of the given keys from the labels of the next layer"""
+    positions = _positions
+    next_keys, next_values = _next_keys, _next_values
+    results = bytearray(len(keys))
+    distances = bytearray(len(keys))
+    for index, key in enumerate(keys):
+        heights, workers, turn = positions.decode(key)
+        if positions.is_over(heights, workers, turn):
+            results[index] = LOSS
+            continue
+        if positions.can_win(heights, workers, turn):
+            results[index], distances[index] = WIN, 1
+            continue
+
+        fastest_win = None
+        slowest_loss = None
+        for child in positions.children(heights, workers, turn):
+            at = bisect_left(next_keys, positions.canonical_key(*child))
+            result, distance = next_values[2 * at], next_values[2 * at + 1]
+            if result == LOSS:
+                if fastest_win is None or distance < fastest_win:
+                    fastest_win = distance
+            elif slowest_loss is None or distance > slowest_loss:
+                slowest_loss = distance
+
+        if fastest_win is not None:
+            results[index], distances[index] = WIN, fastest_win + 1
+        elif slowest_loss is not None:
+            results[index], distances[index] = LOSS, slowest_loss + 1
+        else:
+            # the side to move cannot move
+            results[index] = LOSS
+
+    return results, distances
+
+def _chunks(keys, chunksize):
+    return (keys[index:index + chunksize] for index in range(0, len(keys), chunksize))
+
+def solve(size, start=None, processes=None, chunksize=4096, progress=None):
+    """Enumerate and label every position reachable from start and return a SolvedTable
+
+    start is (heights, workers, turn) with squares indexed row * size + col
+    and defaults to the start position. Each layer is split into chunks of
+    keys across a process pool. progress, if given, is called with (phase,
+    levels built, positions in the layer).
+    """
+    positions = Positions(size)
+    if start is None:
+        start = positions.start()
+    first = sum(start[0])
+
+    # layers[n] -> sorted keys of the positions n turns after start
+    layers = [array("Q", [positions.canonical_key(*start)])]
+    with Pool(processes, _init_worker, (size,)) as pool:
+        while True:
+            following = set()
+            for keys in pool.imap_unordered(_expand, _chunks(layers[-1], chunksize)):
+                following.update(keys)
+            if not following:
+                break
+            layers.append(array("Q", sorted(following)))
+            del following
+            if progress:
+                progress("enumerate", first + len(layers) - 1, len(layers[-1]))
+
+    # label from the last layer back; a layer only needs the labels of the next one
+    labelled = [None] * len(layers)
+    next_keys, next_values = array("Q"), bytearray()
+    for depth in range(len(layers) - 1, -1, -1):
+        keys = layers[depth]
+        results = bytearray()
+        distances = bytearray()
+        with Pool(processes, _init_worker, (size, next_keys, next_values)) as pool:
+            for chunk_results, chunk_distances in pool.imap(_label, _chunks(keys, chunksize)):
+                results += chunk_results
+                distances += chunk_distances
+
+        labelled[depth] = (keys, results, distances)
+        next_keys = keys
+        next_values = bytearray(2 * len(keys))
+        next_values[0::2] = results
+        next_values[1::2] = distances
+        if progress:
+            progress("label", first + depth, len(keys))
+
+    empty = (array("Q"), bytearray(), bytearray())
+    table_layers = [empty] * first + labelled
+    table_layers += [empty] * (4 * positions.squares + 1 - len(table_layers))
+    return SolvedTable(size, table_layers)
+
+def _board_position(board):
+    """Return (heights, workers, turn) of a Board"""
+    size = board.get_size()
+    heights = [space.get_height() for row in board._board_layout for space in row]
+    workers = [board.get_worker(name).get_worker_row() * size + board.get_worker(name).get_worker_col()
+               for name in WORKER_NAMES]
+    return heights, workers, board.get_turn()
+
+def check_player(table, player_type, sample=1000, seed=0):
+    """Play a Board player in won positions of the table and count how often it keeps the win
+
+    Only players that play on Board (random, heuristic) handle boards other
+    than 5x5. Returns a summary dict.
+    """
+    rand = random.Random(seed)
+    won = [(layer, index) for layer, (_, results, _) in enumerate(table.layers)
+           for index, result in enumerate(results) if result == WIN]
+    chosen = rand.sample(won, min(sample, len(won)))
+    positions = table.positions
+    size = table.size
+
+    kept = 0
+    fastest = 0
+    for layer, index in chosen:
+        keys, _, distances = table.layers[layer]
+        heights, workers, turn = positions.decode(keys[index])
+        pieces = [Worker(name, *divmod(sq, size)) for name, sq in zip(WORKER_NAMES, workers)]
+        board = Board(*pieces, size=size)
+        board.set_position([heights[row * size:(row + 1) * size] for row in range(size)], pieces, turn)
+        factory, own = (WhitePlayerFactory, pieces[:2]) if turn == 0 else (BluePlayerFactory, pieces[2:])
+        player = create_player(factory, player_type, own[0], own[1], board)
+        player.set_events(NullSink())
+        player.take_turn()
+
+        result, distance = table.probe(*_board_position(board))
+        if result == LOSS:
+            kept += 1
+            if distance + 1 == distances[index]:
+                fastest += 1
+
+    return {"player": player_type, "positions": len(chosen), "kept_win": kept, "fastest_win": fastest,
+            "kept_win_rate": kept / len(chosen) if chosen else 0.0}
+
+def summarize(table, start, elapsed):
+    result, distance = table.probe(*start)
+    counts = {name: table.count(value) for value, name in RESULT_NAMES.items()}
+    return {"size": table.size, "positions": len(table), "results": counts,
+            "start": {"result": RESULT_NAMES[result], "distance": distance},
+            "elapsed": elapsed, "positions_per_second": len(table) / elapsed if elapsed else 0.0}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve a small board exactly")
+    parser.add_argument("--size", type=int, default=3)
+    parser.add_argument("--position", default=None, help="Board notation of the position to solve from")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=4096, help="positions handed to a worker at a time")
+    parser.add_argument("--output", default=None, help="file to save the solved table to")
+    parser.add_argument("--table", default=None, help="load a solved table instead of solving")
+    parser.add_argument("--check", default=None, choices=["random", "heuristic"],
+                        help="check how often a player keeps a won position")
+    parser.add_argument("--sample", type=int, default=1000, help="won positions to check the player in")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="report every layer")
+    args = parser.parse_args()
+
+    start_position = None
+    size = args.size
+    if args.position is not None:
+        board = Board.from_notation(args.position)
+        start_position = _board_position(board)
+        size = board.get_size()
+
+    start = time.perf_counter()
+    if args.table is not None:
+        table = SolvedTable.load(args.table)
+    else:
+        report = (lambda phase, layer, count: print(f"{phase} {layer} levels: {count} positions")) if args.verbose else None
+        table = solve(size, start_position, args.processes, args.chunksize, report)
+    elapsed = time.perf_counter() - start
+    if args.output is not None:
+        table.save(args.output)
+
+    if start_position is None:
+        start_position = table.positions.start()
+    summary = summarize(table, start_position, elapsed)
+    if args.check is not None:
+        summary["check"] = check_player(table, args.check, args.sample, args.seed)
+    print(json.dumps(summary, indent=2))
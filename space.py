@@ -1,8 +1,9 @@
-import sys
 from worker import Worker
+from neighbors import OFFSET_MAP
 
 class Space:
-    OFFSET_MAP = {'n':[-1, 0], 'ne':[-1, +1], 'e':[0, 1], 'se':[1, 1], 's':[1, 0], 'sw':[1, -1], 'w':[0, -1], 'nw':[-1, -1]}
+    OFFSET_MAP = OFFSET_MAP
+    __slots__ = ("_height", "_worker_on_space", "_row", "_col")
 
     def __init__(self, row, col, worker: Worker = None):
         self._height = 0
@@ -0,0 +1,178 @@
+from board import Board
+from worker import Worker
+from neighbors import NEIGHBOR_SQUARES, SIZE, SQUARES
+from zobrist import WORKER_NAMES, HEIGHT_KEYS, WORKER_KEYS, SIDE_KEY, hash_position
+
+class GameState:
+    """Compact array-backed position used by the AI players.
+
+    Heights are stored in a bytearray of 25 squares (row * 5 + col), the
+    workers as square indices in the order A, B, Y, Z and the side to move
+    as 0 (white, workers A and B) or 1 (blue, workers Y and Z).
+    A turn is a (worker, move square, build square) triple. key is the
+    Zobrist key of the position and is kept up to date by make/unmake.
+    """
+
+    def __init__(self, heights=None, workers=None, turn=0):
+        self.heights = bytearray(heights) if heights is not None else bytearray(SQUARES)
+        self.workers = list(workers) if workers is not None else [16, 8, 6, 18]
+        self.turn = turn
+        self.key = hash_position(self.heights, self.workers, turn)
+        self._history = []
+
+    def __eq__(self, other):
+        return (isinstance(other, GameState) and self.heights == other.heights
+                and self.workers == other.workers and self.turn == other.turn)
+
+    def __hash__(self):
+        return self.key
+
+    def __str__(self):
+        ret_str = ""
+        for row in range(SIZE):
+            ret_str += "+--+--+--+--+--+\n"
+            for col in range(SIZE):
+                sq = row * SIZE + col
+                name = " "
+                if sq in self.workers:
+                    name = WORKER_NAMES[self.workers.index(sq)]
+                ret_str += f"|{self.heights[sq]}{name}"
+            ret_str += "|\n"
+        ret_str += "+--+--+--+--+--+"
+
+        return ret_str
+
+    @classmethod
+    def from_board(cls, board: Board, turn=0):
+        """Build a state from a 5x5 Board holding workers A, B, Y and Z"""
+        if board.get_size() != SIZE:
+            raise ValueError(f"GameState only holds {SIZE}x{SIZE} boards, not {board.get_size()}x{board.get_size()}")
+        heights = bytearray(SQUARES)
+        for row in board._board_layout:
+            for space in row:
+                pos = space.get_position()
+                heights[pos[0] * SIZE + pos[1]] = space.get_height()
+
+        workers = []
+        for name in WORKER_NAMES:
+            pos = board.get_worker(name).get_worker_pos()
+            workers.append(pos[0] * SIZE + pos[1])
+
+        return cls(heights, workers, turn)
+
+    def to_board(self):
+        """Build a Board with fresh workers placed as in this state"""
+        workers = [Worker(name, *divmod(sq, SIZE)) for name, sq in zip(WORKER_NAMES, self.workers)]
+        board = Board(*workers)
+        heights = [list(self.heights[row * SIZE:(row + 1) * SIZE]) for row in range(SIZE)]
+        board.set_position(heights, workers, self.turn)
+
+        return board
+
+    def copy(self):
+        return GameState(self.heights, self.workers, self.turn)
+
+    def current_workers(self):
+        """Return the worker indices of the side to move"""
+        return (0, 1) if self.turn == 0 else (2, 3)
+
+    def find_moves(self, worker):
+        """Find all squares a worker can move to"""
+        heights = self.heights
+        workers = self.workers
+        limit = heights[workers[worker]] + 1
+        return [sq for sq in NEIGHBOR_SQUARES[workers[worker]]
+                if heights[sq] <= limit and heights[sq] < 4 and sq not in workers]
+
+    def find_builds(self, square):
+        """Find all squares a worker standing on square can build on"""
+        heights = self.heights
+        workers = self.workers
+        return [sq for sq in NEIGHBOR_SQUARES[square] if heights[sq] < 4 and sq not in workers]
+
+    def legal_turns(self):
+        """Return every legal (worker, move, build) turn for the side to move"""
+        turns = []
+        heights = self.heights
+        workers = self.workers
+        for worker in self.current_workers():
+            start = workers[worker]
+            for to in self.find_moves(worker):
+                workers[worker] = to
+                for build in NEIGHBOR_SQUARES[to]:
+                    if heights[build] < 4 and build not in workers:
+                        turns.append((worker, to, build))
+            workers[worker] = start
+
+        return turns
+
+    def win_threats(self, side):
+        """Return the squares the workers of side (0 white, 1 blue) could step onto to win"""
+        heights = self.heights
+        workers = self.workers
+        threats = []
+        for worker in ((0, 1) if side == 0 else (2, 3)):
+            if heights[workers[worker]] == 2:
+                threats.extend(sq for sq in NEIGHBOR_SQUARES[workers[worker]]
+                               if heights[sq] == 3 and sq not in workers)
+        return threats
+
+    def winning_turns(self, turns=None):
+        """Return the turns that win on the spot by stepping onto height 3"""
+        if turns is None:
+            turns = self.legal_turns()
+        heights = self.heights
+        return [turn for turn in turns if heights[turn[1]] == 3]
+
+    def blocking_turns(self, turns=None):
+        """Return the turns after which the other side has no winning move"""
+        if turns is None:
+            turns = self.legal_turns()
+        other = self.turn ^ 1
+        blocking = []
+        for turn in turns:
+            self.make(turn)
+            if not self.win_threats(other):
+                blocking.append(turn)
+            self.unmake(turn)
+        return blocking
+
+    def has_moves(self):
+        """Check if the side to move can move any worker"""
+        return any(self.find_moves(worker) for worker in self.current_workers())
+
+    def make(self, turn):
+        """Apply a (worker, move, build) turn and pass the move to the other side"""
+        worker, to, build = turn
+        start = self.workers[worker]
+        height = self.heights[build]
+        self._history.append(start)
+        self.workers[worker] = to
+        self.heights[build] = height + 1
+        self.turn ^= 1
+        self.key ^= (WORKER_KEYS[worker][start] ^ WORKER_KEYS[worker][to]
+                     ^ HEIGHT_KEYS[build][height] ^ HEIGHT_KEYS[build][height + 1] ^ SIDE_KEY)
+
+    def unmake(self, turn):
+        """Revert the last turn applied with make"""
+        worker, to, build = turn
+        start = self._history.pop()
+        height = self.heights[build] - 1
+        self.turn ^= 1
+        self.heights[build] = height
+        self.workers[worker] = start
+        self.key ^= (WORKER_KEYS[worker][start] ^ WORKER_KEYS[worker][to]
+                     ^ HEIGHT_KEYS[build][height] ^ HEIGHT_KEYS[build][height + 1] ^ SIDE_KEY)
+
+    def winner(self):
+        """Return 0 or 1 if a side has won, otherwise None
+
+        A side wins by standing on height 3; the side to move loses if
+        neither of its workers can move.
+        """
+        for worker, sq in enumerate(self.workers):
+            if self.heights[sq] == 3:
+                return 0 if worker < 2 else 1
+        if not self.has_moves():
+            return self.turn ^ 1
+        return None
@@ -0,0 +1,81 @@
+"""Dihedral symmetries of the board and canonical positions.
+
+Each of the 8 rotations and reflections is a permutation of the squares.
+Two positions that differ only by a symmetry, or by swapping the two workers
+of the same player, have the same canonical form, so results stored for one
+can be reused for the other.
+"""
+from functools import lru_cache
+from operator import itemgetter
+from neighbors import SIZE, SQUARES
+from state import GameState
+from zobrist import hash_position
+
+def _transform(row, col, index, size=SIZE):
+    last = size - 1
+    if index & 4:
+        row, col = col, row
+    if index & 2:
+        row = last - row
+    if index & 1:
+        col = last - col
+    return row * size + col
+
+@lru_cache(maxsize=None)
+def square_transforms(size=SIZE):
+    """Return the 8 square permutations of a size x size board, the identity first"""
+    return tuple(tuple(_transform(*divmod(sq, size), index, size) for sq in range(size * size)) for index in range(8))
+
+# TRANSFORMS[t][sq] -> square that sq is mapped to by transform t; transform 0 is the identity
+TRANSFORMS = square_transforms(SIZE)
+INVERSE = tuple(next(j for j in range(8) if all(TRANSFORMS[j][TRANSFORMS[t][sq]] == sq for sq in range(SQUARES)))
+                for t in range(8))
+
+# _HEIGHT_GETTERS[t](heights) -> heights laid out after transform t
+_HEIGHT_GETTERS = tuple(itemgetter(*TRANSFORMS[INVERSE[t]]) for t in range(8))
+
+def transform_state(state, transform):
+    """Return a copy of state with every square mapped by transform"""
+    squares = TRANSFORMS[transform]
+    return GameState(_HEIGHT_GETTERS[transform](state.heights),
+                     [squares[sq] for sq in state.workers], state.turn)
+
+def canonicalize(state):
+    """Return (canonical state, transform) for state
+
+    The canonical state is the smallest of the 8 symmetric images, comparing
+    heights and then the squares of each player's workers in ascending order,
+    and has each player's workers sorted by square. transform maps squares of
+    state to squares of the canonical state.
+    """
+    a, b, y, z = state.workers
+    best = None
+    best_transform = 0
+    for transform in range(8):
+        squares = TRANSFORMS[transform]
+        white = sorted((squares[a], squares[b]))
+        blue = sorted((squares[y], squares[z]))
+        candidate = (_HEIGHT_GETTERS[transform](state.heights), white, blue)
+        if best is None or candidate < best:
+            best = candidate
+            best_transform = transform
+
+    heights, white, blue = best
+    return GameState(heights, white + blue, state.turn), best_transform
+
+def canonical_key(state):
+    """Return a Zobrist key shared by every position symmetric to state"""
+    canonical, _ = canonicalize(state)
+    return hash_position(canonical.heights, canonical.workers, canonical.turn)
+
+def to_canonical_turn(state, turn, transform, canonical):
+    """Map a turn played in state to the same turn in its canonical state"""
+    worker, move, build = turn
+    squares = TRANSFORMS[transform]
+    return (canonical.workers.index(squares[state.workers[worker]]), squares[move], squares[build])
+
+def from_canonical_turn(state, turn, transform, canonical):
+    """Map a turn played in the canonical state back to state"""
+    worker, move, build = turn
+    squares = TRANSFORMS[INVERSE[transform]]
+    return (state.workers.index(squares[canonical.workers[worker]]), squares[move], squares[build])
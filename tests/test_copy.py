@@ -0,0 +1,54 @@
+import random
+from board import Board
+from neighbors import TARGET_DIRECTION
+from state import GameState
+from worker import Worker
+from zobrist import WORKER_NAMES
+
+def _play(board, rand, count):
+    """Play up to count random turns on board with its move and build methods"""
+    for _ in range(count):
+        state = GameState.from_board(board, board.get_turn())
+        turns = state.legal_turns()
+        if not turns or state.winner() is not None:
+            return
+        worker, to, build = rand.choice(turns)
+        piece = board.get_worker(WORKER_NAMES[worker])
+        board.move(TARGET_DIRECTION[state.workers[worker]][to], piece)
+        board.build(TARGET_DIRECTION[to][build], piece)
+
+def _position(board):
+    return GameState.from_board(board, board.get_turn()), board.get_hash(), str(board)
+
+def _start():
+    return Board(Worker('A', 3, 1), Worker('B', 1, 3), Worker('Y', 1, 1), Worker('Z', 3, 3))
+
+def test_copy_is_the_same_position_with_its_own_workers():
+    rand = random.Random(10)
+    for count in range(0, 30, 3):
+        board = _start()
+        _play(board, rand, count)
+        copy = board.copy()
+        assert _position(copy) == _position(board)
+        for name in WORKER_NAMES:
+            assert copy.get_worker(name) is not board.get_worker(name)
+            assert copy.get_worker(name).get_worker_pos() == board.get_worker(name).get_worker_pos()
+
+def test_playing_on_a_copy_leaves_the_original_alone():
+    rand = random.Random(11)
+    board = _start()
+    _play(board, rand, 6)
+    before = _position(board)
+    copy = board.copy()
+    _play(copy, rand, 6)
+    assert _position(board) == before
+    assert _position(copy) != before
+
+def test_copy_and_original_agree_after_the_same_turns():
+    board = _start()
+    _play(board, random.Random(12), 4)
+    copy = board.copy()
+    _play(board, random.Random(13), 8)
+    _play(copy, random.Random(13), 8)
+    assert _position(copy) == _position(board)
+    assert copy.get_hash() == GameState.from_board(copy, copy.get_turn()).key
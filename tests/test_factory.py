@@ -0,0 +1,27 @@
+import pytest
+from board import Board
+from evaluation import DEFAULT_WEIGHTS
+from factory import WhitePlayerFactory, BluePlayerFactory, create_player
+from worker import Worker
+
+WEIGHTS = (5, 1, 2, 8)
+
+def _board():
+    return Board(Worker('A', 3, 1), Worker('B', 1, 3), Worker('Y', 1, 1), Worker('Z', 3, 3))
+
+@pytest.mark.parametrize("factory, color", [(WhitePlayerFactory, "white"), (BluePlayerFactory, "blue")])
+@pytest.mark.parametrize("player_type", ["human", "random", "heuristic", "search", "mcts"])
+def test_create_player_passes_weights_on(factory, color, player_type):
+    board = _board()
+    workers = [board.get_worker('A'), board.get_worker('B')]
+    player = create_player(factory, player_type, *workers, board, weights=WEIGHTS)
+    assert player.color == color
+    assert player.weights == WEIGHTS
+    if player_type in ("search", "mcts"):
+        assert player._search.weights == WEIGHTS
+
+def test_create_player_defaults():
+    board = _board()
+    player = create_player(WhitePlayerFactory, "unknown", board.get_worker('A'), board.get_worker('B'), board)
+    assert type(player).__name__ == "HeuristicPlayer"
+    assert player.weights == DEFAULT_WEIGHTS
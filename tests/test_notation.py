@@ -0,0 +1,65 @@
+import random
+import pytest
+from board import Board, NotationError
+from neighbors import start_positions
+from worker import Worker
+from zobrist import WORKER_NAMES
+
+START = "00000/00000/00000/00000/00000 31,13,11,33 w"
+
+def _start_board(size=5):
+    return Board(*[Worker(name, *pos) for name, pos in zip(WORKER_NAMES, start_positions(size))], size=size)
+
+def _play_random_turns(board, count, seed):
+    rand = random.Random(seed)
+    workers = [board.get_worker(name) for name in WORKER_NAMES]
+    for turn in range(count):
+        turns = list(board.generate_turns(workers[:2] if turn % 2 == 0 else workers[2:]))
+        if not turns:
+            break
+        worker, move, build = rand.choice(turns)
+        board.move(move, worker)
+        board.build(build, worker)
+
+def test_start_position_round_trips():
+    board = Board.from_notation(START)
+    assert board.to_notation() == START
+    assert board.get_turn() == 0
+    assert _start_board().to_notation() == START
+
+@pytest.mark.parametrize("size", [3, 4, 5])
+def test_played_positions_round_trip(size):
+    for seed in range(20):
+        board = _start_board(size)
+        _play_random_turns(board, seed % 7, seed)
+        text = board.to_notation()
+        copy = Board.from_notation(text)
+        assert copy.get_size() == size
+        assert copy.to_notation() == text
+        assert copy.get_hash() == board.get_hash()
+
+def test_blue_to_move():
+    board = Board.from_notation(START[:-1] + "b")
+    assert board.get_turn() == 1
+    assert board.to_notation().endswith(" b")
+
+@pytest.mark.parametrize("text", [
+    "",
+    "00000/00000/00000/00000/00000 31,13,11,33",
+    "00000/00000/00000/00000/00000 31,13,11,33 w extra",
+    "00000/00000/00000/00000/00000 31,13,11,33 wb",
+    "00000/00000/00000/00000/00000 31,13,11,33 x",
+    "00000/00000/00000/00000 31,13,11,33 w",
+    "00000/00000/00000/00000/0000 31,13,11,33 w",
+    "00000/00000/00000/00000/00005 31,13,11,33 w",
+    "00000/00000/00000/00000/0000x 31,13,11,33 w",
+    "00²00/00000/00000/00000/00000 31,13,11,33 w",
+    "00000/00000/00000/00000/00000 31,13,11 w",
+    "00000/00000/00000/00000/00000 31,31,11,33 w",
+    "00000/00000/00000/00000/00000 31,13,11,35 w",
+    "00000/04000/00000/00000/00000 31,13,11,33 w",
+    "000/000/000 00,01,10,33 w",
+])
+def test_bad_notation_is_rejected(text):
+    with pytest.raises(NotationError):
+        Board.from_notation(text)
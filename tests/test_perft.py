@@ -0,0 +1,16 @@
+import pytest
+from perft import POSITIONS, REFERENCE, run_perft
+
+@pytest.mark.parametrize("depth", [1, 2, 3])
+def test_state_counts_match_the_reference(depth):
+    for name, nodes, expected, _ in run_perft(depth):
+        assert nodes == expected, name
+
+@pytest.mark.parametrize("depth", [1, 2])
+def test_board_counts_match_the_reference(depth):
+    for name, nodes, expected, _ in run_perft(depth, engine="board"):
+        assert nodes == expected, name
+
+def test_every_position_has_reference_counts():
+    for name in POSITIONS:
+        assert all((name, depth) in REFERENCE for depth in (1, 2, 3, 4))
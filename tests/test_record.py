@@ -0,0 +1,81 @@
+import random
+import pytest
+from record import (FILE_HEADER, GAME_HEADER, GameRecordReader, GameRecordWriter, RecordFormatError,
+                    decode_turn, encode_game, encode_turn)
+from state import GameState
+
+def _random_game(seed):
+    """Return (initial state, turns, winner) of a random game"""
+    rand = random.Random(seed)
+    initial = GameState()
+    state = initial.copy()
+    turns = []
+    while state.legal_turns() and state.winner() is None:
+        turn = rand.choice(state.legal_turns())
+        state.make(turn)
+        turns.append(turn)
+    return initial, turns, state.winner()
+
+def test_every_turn_round_trips_through_one_byte():
+    initial, turns, _ = _random_game(7)
+    state = initial.copy()
+    for turn in turns:
+        for legal in state.legal_turns():
+            code = encode_turn(state, legal)
+            assert 0 <= code < 256
+            assert decode_turn(state, code) == legal
+        state.make(turn)
+
+def test_games_round_trip_through_a_file(tmp_path):
+    path = tmp_path / "games.rec"
+    games = [_random_game(seed) for seed in range(10)]
+    with GameRecordWriter(path, buffer_games=3) as writer:
+        for initial, turns, winner in games[:5]:
+            writer.write_game(initial, turns, winner)
+    with GameRecordWriter(path) as writer:
+        for initial, turns, winner in games[5:]:
+            writer.write_encoded(encode_game(initial, turns, winner))
+        writer.write_game(GameState(), [])
+
+    with GameRecordReader(path) as reader:
+        records = list(reader)
+    assert len(records) == len(games) + 1
+    for record, (initial, turns, winner) in zip(records, games):
+        assert record.initial == initial
+        assert list(record.turns()) == turns
+        assert len(record) == len(turns)
+        assert record.winner == winner
+    assert len(records[-1]) == 0 and records[-1].winner is None
+
+def test_positions_are_the_states_before_each_turn(tmp_path):
+    path = tmp_path / "games.rec"
+    initial, turns, winner = _random_game(8)
+    with GameRecordWriter(path) as writer:
+        writer.write_game(initial, turns, winner)
+
+    state = initial.copy()
+    with GameRecordReader(path) as reader:
+        for record, position, turn in reader.positions():
+            assert position == state
+            state.make(turn)
+    assert state.winner() == winner
+
+def test_a_file_without_the_header_is_rejected(tmp_path):
+    for data in (b"", b"SNTR\x02", b"not a record"):
+        path = tmp_path / "bad.rec"
+        path.write_bytes(data)
+        with pytest.raises(RecordFormatError):
+            GameRecordReader(path)
+
+@pytest.mark.parametrize("cut, message", [(1, "truncated game turns"), (None, "truncated game header")])
+def test_truncated_games_are_reported(tmp_path, cut, message):
+    initial, turns, winner = _random_game(9)
+    data = encode_game(initial, turns, winner)
+    # cut the last turn byte off, or cut into the header of a second game
+    data = FILE_HEADER + (data[:-cut] if cut else data + data[:GAME_HEADER.size - 1])
+    path = tmp_path / "truncated.rec"
+    path.write_bytes(data)
+
+    with GameRecordReader(path) as reader:
+        with pytest.raises(RecordFormatError, match=message):
+            list(reader)
@@ -0,0 +1,42 @@
+import asyncio
+from server import GameServer
+
+async def _serve(play):
+    """Run play(server, reader, writer) against a server on a free port"""
+    server = GameServer(threads=2)
+    listener = await asyncio.start_server(server._accept, "127.0.0.1", 0)
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", listener.sockets[0].getsockname()[1])
+        await play(server, reader, writer)
+    finally:
+        listener.close()
+        await listener.wait_closed()
+        server._executor.shutdown()
+
+async def _request(reader, writer, line):
+    writer.write(line.encode() + b"\n")
+    await writer.drain()
+    return (await reader.readline()).decode().strip()
+
+def test_new_game_replies_with_its_id():
+    async def play(server, reader, writer):
+        assert await _request(reader, writer, "NEW human random") == "OK 1"
+        assert list(server.games) == ["1"]
+        assert (await reader.readline()).startswith(b"BOARD 1 1 white ")
+        writer.close()
+
+    asyncio.run(_serve(play))
+
+def test_game_is_dropped_when_its_human_seat_disconnects():
+    async def play(server, reader, writer):
+        assert await _request(reader, writer, "NEW human random") == "OK 1"
+        writer.close()
+        await writer.wait_closed()
+
+        for _ in range(100):
+            if not server.games:
+                break
+            await asyncio.sleep(0.01)
+        assert server.games == {}
+
+    asyncio.run(_serve(play))
@@ -0,0 +1,51 @@
+import random
+from state import GameState
+
+def _playout(state, rand, plies=40):
+    """Play random turns until the game ends, returning the turns played"""
+    played = []
+    for _ in range(plies):
+        turns = state.legal_turns()
+        if not turns or state.winner() is not None:
+            break
+        turn = rand.choice(turns)
+        state.make(turn)
+        played.append(turn)
+    return played
+
+OFFSETS = {'n': (-1, 0), 'ne': (-1, 1), 'e': (0, 1), 'se': (1, 1), 's': (1, 0), 'sw': (1, -1), 'w': (0, -1), 'nw': (-1, -1)}
+
+def _board_turns(state):
+    """Find the legal turns of state with the Board rules instead of GameState"""
+    turns = set()
+    for index in state.current_workers():
+        name = "ABYZ"[index]
+        for move in state.to_board().find_all_possible_moves(divmod(state.workers[index], 5)):
+            board = state.to_board()
+            board.move(move, board.get_worker(name))
+            row, col = board.get_worker(name).get_worker_pos()
+            for build in board.find_all_possible_builds([row, col]):
+                d_row, d_col = OFFSETS[build]
+                turns.add((index, row * 5 + col, (row + d_row) * 5 + col + d_col))
+    return turns
+
+def test_start_position_has_80_turns():
+    assert len(GameState().legal_turns()) == 80
+
+def test_legal_turns_match_the_board_rules():
+    rand = random.Random(1)
+    for _ in range(20):
+        state = GameState()
+        _playout(state, rand, rand.randrange(20))
+        if state.winner() is None:
+            assert set(state.legal_turns()) == _board_turns(state)
+
+def test_unmake_restores_the_position():
+    rand = random.Random(2)
+    for _ in range(50):
+        state = GameState()
+        start = state.copy()
+        played = _playout(state, rand)
+        for turn in reversed(played):
+            state.unmake(turn)
+        assert state == start
@@ -0,0 +1,66 @@
+import random
+from board import Board
+from memento import ConcreteMemento, Caretaker
+from neighbors import TARGET_DIRECTION
+from state import GameState
+from worker import Worker
+from zobrist import WORKER_NAMES
+
+class Game:
+    """The originator side of MainCLI: one memento per turn played on a board"""
+
+    def __init__(self):
+        self.board = Board(Worker('A', 3, 1), Worker('B', 1, 3), Worker('Y', 1, 1), Worker('Z', 3, 3))
+        self.caretaker = Caretaker(self)
+
+    def save(self):
+        return ConcreteMemento(self.board.get_last_turn())
+
+    def restore(self, memento):
+        self.board.revert_turn(*memento.get_state())
+
+    def replay(self, memento):
+        self.board.replay_turn(*memento.get_state())
+
+    def snapshot(self):
+        return GameState.from_board(self.board, self.board.get_turn()), self.board.get_hash()
+
+    def play_random_turn(self, rand):
+        state = GameState.from_board(self.board, self.board.get_turn())
+        turns = state.legal_turns()
+        if not turns or state.winner() is not None:
+            return False
+        worker, to, build = rand.choice(turns)
+        piece = self.board.get_worker(WORKER_NAMES[worker])
+        self.board.move(TARGET_DIRECTION[state.workers[worker]][to], piece)
+        self.board.build(TARGET_DIRECTION[to][build], piece)
+        self.caretaker.next()
+        return True
+
+def test_undo_and_redo_walk_through_the_same_positions():
+    rand = random.Random(5)
+    for _ in range(20):
+        game = Game()
+        snapshots = [game.snapshot()]
+        while len(snapshots) < 30 and game.play_random_turn(rand):
+            snapshots.append(game.snapshot())
+
+        for snapshot in reversed(snapshots[:-1]):
+            assert game.caretaker.undo()
+            assert game.snapshot() == snapshot
+        assert not game.caretaker.undo()
+
+        for snapshot in snapshots[1:]:
+            assert game.caretaker.redo()
+            assert game.snapshot() == snapshot
+        assert not game.caretaker.redo()
+
+def test_a_new_turn_drops_the_redos():
+    rand = random.Random(6)
+    game = Game()
+    for _ in range(4):
+        game.play_random_turn(rand)
+    game.caretaker.undo()
+    game.caretaker.undo()
+    game.play_random_turn(rand)
+    assert not game.caretaker.redo()
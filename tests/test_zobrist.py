@@ -0,0 +1,42 @@
+import random
+from board import Board
+from neighbors import TARGET_DIRECTION
+from state import GameState
+from worker import Worker
+from zobrist import WORKER_NAMES, hash_position
+
+def _key(state):
+    return hash_position(state.heights, state.workers, state.turn)
+
+def test_make_and_unmake_keep_the_key_up_to_date():
+    rand = random.Random(3)
+    for _ in range(30):
+        state = GameState()
+        played = []
+        while state.legal_turns() and state.winner() is None and len(played) < 40:
+            turn = rand.choice(state.legal_turns())
+            state.make(turn)
+            played.append(turn)
+            assert state.key == _key(state)
+        for turn in reversed(played):
+            state.unmake(turn)
+            assert state.key == _key(state)
+        assert state.key == GameState().key
+
+def test_board_hash_follows_moves_and_builds():
+    rand = random.Random(4)
+    for _ in range(30):
+        board = Board(Worker('A', 3, 1), Worker('B', 1, 3), Worker('Y', 1, 1), Worker('Z', 3, 3))
+        state = GameState.from_board(board)
+        assert board.get_hash() == state.key
+        while state.legal_turns() and state.winner() is None and state.heights.count(0) > 10:
+            worker, to, build = turn = rand.choice(state.legal_turns())
+            piece = board.get_worker(WORKER_NAMES[worker])
+            board.move(TARGET_DIRECTION[state.workers[worker]][to], piece)
+            board.build(TARGET_DIRECTION[to][build], piece)
+            state.make(turn)
+            assert board.get_hash() == state.key
+            assert board.get_hash() == GameState.from_board(board, board.get_turn()).key
+
+def test_side_to_move_changes_the_key():
+    assert GameState(turn=0).key != GameState(turn=1).key
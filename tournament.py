@@ -0,0 +1,161 @@
+"""Headless self-play tournaments between AI player types.
+
+    python tournament.py random heuristic --games 1000 --processes 8 --seed 1
+
+Games are spread over a process pool, each seeded with seed + game number,
+and the players swap colors every other game. Nothing is printed while games
+are played; the aggregate results are printed as JSON at the end. With
+--record the games are also appended to a binary game record file.
+"""
+import argparse
+import json
+import os
+import random
+import time
+from multiprocessing import Pool
+from board import Board
+from worker import Worker
+from factory import WhitePlayerFactory, BluePlayerFactory, create_player
+from player import Player, SearchPlayer, MCTSPlayer
+from opening_book import OpeningBook
+from record import GameRecordWriter, encode_game
+from events import NullSink
+from state import GameState
+from zobrist import WORKER_INDEX
+from evaluation import load_weights
+
+PLAYER_TYPES = ["random", "heuristic", "search", "mcts"]
+
+def init_worker(time_limit, book):
+    """Pool initializer for processes that play games: load the opening book and set the AI time limit"""
+    if book is not None:
+        Player.OPENING_BOOK = OpeningBook(book)
+    if time_limit is not None:
+        SearchPlayer.TIME_LIMIT = time_limit
+        MCTSPlayer.TIME_LIMIT = time_limit
+
+def play_game(task):
+    """Play one game and return its result
+
+    task is (game number, first player type, second player type, seed, first
+    player weights, second player weights), with None weights for the
+    default evaluation. The first player is white in even games and blue in
+    odd games.
+    """
+    game, player1, player2, seed, weights1, weights2 = task
+    random.seed(seed)
+
+    worker_A = Worker('A', 3, 1)
+    worker_B = Worker('B', 1, 3)
+    worker_Y = Worker('Y', 1, 1)
+    worker_Z = Worker('Z', 3, 3)
+    board = Board(worker_A, worker_B, worker_Y, worker_Z)
+
+    white_type, blue_type = (player1, player2) if game % 2 == 0 else (player2, player1)
+    white_weights, blue_weights = (weights1, weights2) if game % 2 == 0 else (weights2, weights1)
+    white_player = create_player(WhitePlayerFactory, white_type, worker_A, worker_B, board, weights=white_weights)
+    blue_player = create_player(BluePlayerFactory, blue_type, worker_Y, worker_Z, board, weights=blue_weights)
+    white_player.set_events(NullSink())
+    blue_player.set_events(NullSink())
+
+    initial = GameState.from_board(board)
+    current, other = white_player, blue_player
+    think_time = {"white": 0.0, "blue": 0.0}
+    played = []
+    turns = 0
+    while True:
+        if any(worker.check_height() for worker in other.get_workers()):
+            winner = other.color
+            break
+        if all(board.find_all_possible_moves(worker.get_worker_pos()) == [] for worker in current.get_workers()):
+            winner = other.color
+            break
+
+        start = time.perf_counter()
+        current.take_turn()
+        think_time[current.color] += time.perf_counter() - start
+
+        worker, _, target, build = board.get_last_turn()
+        played.append((WORKER_INDEX[str(worker)], target, build))
+        turns += 1
+        current, other = other, current
+
+    first_color = "white" if game % 2 == 0 else "blue"
+    second_color = "blue" if game % 2 == 0 else "white"
+    return {"game": game,
+            "seed": seed,
+            "winner": "player1" if winner == first_color else "player2",
+            "turns": turns,
+            "think_time": {"player1": think_time[first_color], "player2": think_time[second_color]},
+            "record": encode_game(initial, played, 0 if winner == "white" else 1)}
+
+def run_tournament(player1, player2, games, processes=None, seed=0, time_limit=None, record=None, book=None,
+                   weights1=None, weights2=None):
+    """Play games between two player types across a process pool and aggregate the results
+
+    time_limit overrides the per-move budget of search and mcts players in
+    seconds. mcts players search in a single process since pool workers
+    cannot start processes of their own. record is the path of a game
+    record file to append the games to and book the path of an opening book
+    for the AI players. weights1 and weights2 are evaluation weights for the
+    two players.
+    """
+    for player_type in (player1, player2):
+        if player_type not in PLAYER_TYPES:
+            raise ValueError(f"unknown or non-AI player type {player_type}")
+
+    tasks = [(game, player1, player2, seed + game, weights1, weights2) for game in range(games)]
+    start = time.perf_counter()
+    chunksize = max(1, games // (16 * (processes or os.cpu_count() or 1)))
+    with Pool(processes, initializer=init_worker, initargs=(time_limit, book)) as pool:
+        results = list(pool.imap_unordered(play_game, tasks, chunksize))
+
+    if record is not None:
+        with GameRecordWriter(record) as writer:
+            for result in sorted(results, key=lambda result: result["game"]):
+                writer.write_encoded(result["record"])
+    elapsed = time.perf_counter() - start
+
+    return summarize(player1, player2, results, elapsed)
+
+def summarize(player1, player2, results, elapsed):
+    """Aggregate a list of play_game results"""
+    games = len(results)
+    total_turns = sum(result["turns"] for result in results)
+    summary = {"games": games, "elapsed": elapsed,
+               "average_turns": total_turns / games if games else 0.0,
+               "turns_per_second": total_turns / elapsed if elapsed else 0.0}
+
+    for slot, player_type in (("player1", player1), ("player2", player2)):
+        wins = sum(1 for result in results if result["winner"] == slot)
+        think = sum(result["think_time"][slot] for result in results)
+        # each player makes about half of the turns, the first mover the extra one
+        player_turns = sum((result["turns"] + (1 if (result["game"] % 2 == 0) == (slot == "player1") else 0)) // 2
+                           for result in results)
+        summary[slot] = {"type": player_type,
+                         "wins": wins,
+                         "win_rate": wins / games if games else 0.0,
+                         "think_time": think,
+                         "think_time_per_turn": think / player_turns if player_turns else 0.0}
+
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play headless games between two AI player types")
+    parser.add_argument("player1", choices=PLAYER_TYPES)
+    parser.add_argument("player2", choices=PLAYER_TYPES)
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds per move for search and mcts players")
+    parser.add_argument("--record", default=None, help="game record file to append the games to")
+    parser.add_argument("--book", default=None, help="opening book file for the AI players")
+    parser.add_argument("--weights1", default=None, help="evaluation weights file for player1")
+    parser.add_argument("--weights2", default=None, help="evaluation weights file for player2")
+    args = parser.parse_args()
+
+    weights1 = None if args.weights1 is None else load_weights(args.weights1)
+    weights2 = None if args.weights2 is None else load_weights(args.weights2)
+    summary = run_tournament(args.player1, args.player2, args.games, args.processes, args.seed, args.time_limit,
+                             args.record, args.book, weights1, weights2)
+    print(json.dumps(summary, indent=2))
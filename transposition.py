@@ -0,0 +1,97 @@
+"""Fixed-size transposition table keyed by Zobrist position keys."""
+from array import array
+
+EXACT = 1
+LOWER = 2
+UPPER = 3
+
+NO_TURN = 0xFFFF
+
+# key (8) + score (4) + turn (2) + depth (1) + bound (1) + generation (1)
+ENTRY_BYTES = 17
+
+class TranspositionTable:
+    """Store depth, bound type, score and best turn for searched positions
+
+    The table holds a power of two number of entries that fits in
+    memory_mb and never grows. With the "depth" policy an entry from the
+    current search is only replaced by a search of at least the same depth;
+    with the "always" policy the newest entry always wins.
+    """
+
+    POLICIES = ("depth", "always")
+
+    def __init__(self, memory_mb=16, policy="depth"):
+        if policy not in TranspositionTable.POLICIES:
+            raise ValueError(f"unknown replacement policy {policy}")
+
+        size = 1
+        while size * 2 * ENTRY_BYTES <= memory_mb * 1024 * 1024:
+            size *= 2
+
+        self.size = size
+        self.policy = policy
+        self._mask = size - 1
+        self.clear()
+
+    def clear(self):
+        """Drop every stored entry"""
+        size = self.size
+        self._generation = 0
+
+        self._keys = array('q', bytes(8 * size))
+        self._scores = array('i', bytes(4 * size))
+        self._turns = array('H', [NO_TURN]) * size
+        self._depths = bytearray(size)
+        self._bounds = bytearray(size)
+        self._generations = bytearray(size)
+
+        self.hits = 0
+        self.stores = 0
+
+    def __len__(self):
+        return self.size - self._bounds.count(0)
+
+    def new_search(self):
+        """Mark the entries stored so far as older than the next search"""
+        self._generation = (self._generation + 1) % 256
+
+    def probe(self, key):
+        """Return (depth, bound, score, turn) for key, or None if it is not stored"""
+        index = key & self._mask
+        if self._bounds[index] == 0 or self._keys[index] != key:
+            return None
+
+        self.hits += 1
+        turn = self._turns[index]
+        return (self._depths[index], self._bounds[index], self._scores[index],
+                None if turn == NO_TURN else decode_turn(turn))
+
+    def store(self, key, depth, bound, score, turn=None):
+        """Store a search result, following the replacement policy"""
+        index = key & self._mask
+        if (self.policy == "depth" and self._bounds[index] != 0 and self._keys[index] != key
+                and self._generations[index] == self._generation and self._depths[index] > depth):
+            return
+
+        if turn is None and self._keys[index] == key and self._bounds[index] != 0:
+            turn_code = self._turns[index]
+        else:
+            turn_code = NO_TURN if turn is None else encode_turn(turn)
+
+        self.stores += 1
+        self._keys[index] = key
+        self._scores[index] = score
+        self._turns[index] = turn_code
+        self._depths[index] = min(depth, 255)
+        self._bounds[index] = bound
+        self._generations[index] = self._generation
+
+def encode_turn(turn):
+    worker, move, build = turn
+    return (worker * 25 + move) * 25 + build
+
+def decode_turn(code):
+    rest, build = divmod(code, 25)
+    worker, move = divmod(rest, 25)
+    return (worker, move, build)
@@ -0,0 +1,128 @@
+"""Tune evaluation weights with SPSA self-play.
+
+    python tune.py --player heuristic --iterations 200 --games 64 --processes 8 --output weights.json
+
+Every iteration picks a random +1/-1 direction for each tuned weight, plays
+games between the weights moved c along the direction and moved c against it
+across a process pool, and steps the weights along the direction by how much
+more the first setting won (simultaneous perturbation stochastic
+approximation). Only the height, center and distance weights are tuned; the
+distance base adds the same amount to both sides and does not change play.
+
+Progress is saved to --checkpoint after every iteration and a run started
+with an existing checkpoint carries on from it, as long as it has the same
+--player and --seed. The current weights are also
+written to --output, which main.py --weights and tournament.py
+--weights1/--weights2 load.
+"""
+import argparse
+import json
+import os
+import random
+import time
+from multiprocessing import Pool
+from evaluation import DEFAULT_WEIGHTS, save_weights
+from tournament import PLAYER_TYPES, init_worker, play_game
+
+TUNED = 3
+
+# SPSA gain schedules a / (k + 1 + A) ** ALPHA and c / (k + 1) ** GAMMA
+ALPHA = 0.602
+GAMMA = 0.101
+
+def perturb(weights, direction, c):
+    """Return the weights moved c along direction, keeping every weight at least 0"""
+    tuned = [max(0.0, weight + c * sign) for weight, sign in zip(weights[:TUNED], direction)]
+    return tuple(tuned) + tuple(weights[TUNED:])
+
+def play_match(pool, player_type, weights1, weights2, games, seed, chunksize=1):
+    """Play games between two weight settings and return the first setting's score from -1 to 1"""
+    tasks = [(game, player_type, player_type, seed + game, weights1, weights2) for game in range(games)]
+    score = 0
+    for result in pool.imap_unordered(play_game, tasks, chunksize):
+        score += 1 if result["winner"] == "player1" else -1
+    return score / games
+
+def load_checkpoint(path):
+    """Return the saved tuning progress, or None if there is no checkpoint yet"""
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def save_checkpoint(path, progress):
+    """Write the progress to a temporary file first so a crash never leaves half a checkpoint"""
+    temp = path + ".tmp"
+    with open(temp, "w") as f:
+        json.dump(progress, f, indent=2)
+    os.replace(temp, path)
+
+def tune(player_type="heuristic", iterations=100, games=64, processes=None, seed=0, a=0.2, c=0.5,
+         weights=DEFAULT_WEIGHTS, checkpoint=None, output=None, time_limit=None):
+    """Run SPSA iterations and return the tuned weights
+
+    games is the number of games per iteration, played with colors swapped
+    every other game. time_limit overrides the per-move budget of search and
+    mcts players in seconds.
+    """
+    if player_type not in PLAYER_TYPES:
+        raise ValueError(f"unknown or non-AI player type {player_type}")
+
+    progress = load_checkpoint(checkpoint)
+    if progress is None:
+        progress = {"player": player_type, "seed": seed, "iteration": 0, "weights": list(weights), "history": []}
+    elif (progress["player"], progress["seed"]) != (player_type, seed):
+        # the games of a run depend on both, so carrying on would mix two runs
+        raise ValueError(f"checkpoint {checkpoint} is a run of {progress['player']} with seed {progress['seed']}, "
+                         f"not {player_type} with seed {seed}")
+    weights = tuple(progress["weights"])
+    stability = iterations / 10
+
+    with Pool(processes, initializer=init_worker, initargs=(time_limit, None)) as pool:
+        chunksize = max(1, games // (4 * (processes or os.cpu_count() or 1)))
+        for k in range(progress["iteration"], iterations):
+            start = time.perf_counter()
+            # the direction and game seeds depend only on the iteration, so a resumed run plays the same games
+            rand = random.Random(seed * 1000003 + k)
+            direction = [rand.choice((-1, 1)) for _ in range(TUNED)]
+            a_k = a / (k + 1 + stability) ** ALPHA
+            c_k = c / (k + 1) ** GAMMA
+
+            plus = perturb(weights, direction, c_k)
+            minus = perturb(weights, direction, -c_k)
+            score = play_match(pool, player_type, plus, minus, games, seed + k * games, chunksize)
+
+            weights = perturb(weights, direction, a_k * score / c_k)
+            weights = tuple(round(weight, 4) for weight in weights[:TUNED]) + weights[TUNED:]
+
+            progress["iteration"] = k + 1
+            progress["weights"] = list(weights)
+            progress["history"].append({"iteration": k + 1, "score": score, "weights": list(weights),
+                                        "elapsed": time.perf_counter() - start})
+            if checkpoint is not None:
+                save_checkpoint(checkpoint, progress)
+            if output is not None:
+                save_weights(output, weights)
+
+    return weights
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune evaluation weights by self-play")
+    parser.add_argument("--player", choices=PLAYER_TYPES, default="heuristic")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--games", type=int, default=64, help="games per iteration")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-a", type=float, default=0.2, help="step size gain")
+    parser.add_argument("-c", type=float, default=0.5, help="perturbation size")
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds per move for search and mcts players")
+    parser.add_argument("--checkpoint", default="tune_checkpoint.json", help="progress file to save and resume from")
+    parser.add_argument("--output", default="weights.json", help="weights file to write")
+    args = parser.parse_args()
+
+    try:
+        weights = tune(args.player, args.iterations, args.games, args.processes, args.seed, args.a, args.c,
+                       checkpoint=args.checkpoint, output=args.output, time_limit=args.time_limit)
+    except ValueError as error:
+        parser.error(str(error))
+    print(json.dumps({"weights": weights}))
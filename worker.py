@@ -1,5 +1,6 @@
-
 class Worker:
+    __slots__ = ("_name", "_row", "_col", "_height")
+
     def __init__(self, name, row, col):
         self._name = name
         self._row = row
@@ -8,6 +9,11 @@ class Worker:
     
     def __str__(self):
         return self._name
+
+    def copy(self):
+        worker = Worker(self._name, self._row, self._col)
+        worker._height = self._height
+        return worker
     
     def get_worker_pos(self):
         return [self._row, self._col]
@@ -27,12 +33,4 @@ class Worker:
         return self._height
 
     def check_height(self):
-        return self._height == 3
-    
-    def check_center(self):
-        if [self._row, self._col] == [2, 2]:
-            return 2
-        elif [self._row, self._col] in [[1,1], [1,2], [1,3], [2,1], [2,3], [3,1], [3,2], [3,3]]:
-            return 1
-        else:
-            return 0
\ No newline at end of file
+        return self._height == 3
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""Zobrist keys for positions: heights per square, worker squares and side to move.
+
+A position key is the xor of one random number per (square, height), one per
+(worker, square) and SIDE_KEY when blue is to move, so a move or a build only
+needs a couple of xors to update it. The keys come from a fixed seed and are
+the same in every process.
+"""
+import random
+from neighbors import SQUARES
+
+WORKER_NAMES = ['A', 'B', 'Y', 'Z']
+WORKER_INDEX = {name: index for index, name in enumerate(WORKER_NAMES)}
+
+MAX_HEIGHT = 4
+
+_random = random.Random(20230417)
+
+# HEIGHT_KEYS[sq][height], WORKER_KEYS[worker][sq]; keys fit in a signed 64-bit integer
+HEIGHT_KEYS = tuple(tuple(_random.getrandbits(63) for _ in range(MAX_HEIGHT + 1)) for _ in range(SQUARES))
+WORKER_KEYS = tuple(tuple(_random.getrandbits(63) for _ in range(SQUARES)) for _ in WORKER_NAMES)
+SIDE_KEY = _random.getrandbits(63)
+
+def hash_position(heights, workers, turn):
+    """Calculate the key of a position from scratch
+
+    heights is indexed by square, workers holds the squares of A, B, Y and Z
+    and turn is 0 when white is to move and 1 when blue is to move.
+    """
+    key = SIDE_KEY if turn else 0
+    for sq, height in enumerate(heights):
+        key ^= HEIGHT_KEYS[sq][height]
+    for worker, sq in enumerate(workers):
+        key ^= WORKER_KEYS[worker][sq]
+
+    return key